@@ -117,71 +117,41 @@
 
 
 
-import torch
-from flask import Flask, request, jsonify
-from transformers import BertTokenizer, BertForSequenceClassification
-import joblib
-import re
+from flask import Flask, request, jsonify, Response, stream_with_context
+import hmac
+import json
 import os
+from micro_batcher import MicroBatcher
+from notice_classifier import NoticeClassifier
+from result_cache import ResultCache
 
 app = Flask(__name__)
 
-class NoticeClassifier:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        
-        # Load tokenizer
-        self.tokenizer = BertTokenizer.from_pretrained('model_tokenizer')
-        
-        # Load label encoder
-        self.label_encoder = joblib.load('label_encoder.joblib')
-        self.class_names = list(self.label_encoder.classes_)
-        
-        # Initialize model with correct architecture
-        self.model = BertForSequenceClassification.from_pretrained(
-            "bert-base-uncased",
-            num_labels=len(self.class_names),
-            ignore_mismatched_sizes=True
-        )
-        
-        # Load trained weights
-        self.model.load_state_dict(
-            torch.load('notice_classifier_model.pt', map_location=self.device)
-        )
-        self.model.to(self.device)
-        self.model.eval()
-    
-    def clean_text(self, text):
-        text = re.sub(r'\n+', '\n', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s.,!?\-]', '', text)
-        return text.strip()
-    
-    def predict(self, text, top_k=3):
-        text = self.clean_text(text)
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=512
-        ).to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            probs = torch.nn.functional.softmax(outputs.logits, dim=1)
-        
-        top_probs, top_indices = torch.topk(probs, k=top_k)
-        results = []
-        for i in range(top_k):
-            label = self.class_names[top_indices[0][i].item()]
-            prob = top_probs[0][i].item()
-            results.append({"label": label, "confidence": round(prob, 4)})
-        
-        return results
+# Concurrent /predict calls are coalesced into batches of at most this many
+# texts, waiting at most this long for a batch to fill
+MAX_BATCH_SIZE = int(os.environ.get('CLASSIFIER_MAX_BATCH_SIZE', 16))
+MAX_WAIT_MS = float(os.environ.get('CLASSIFIER_MAX_WAIT_MS', 10))
+
+# /predict/batch runs forward passes of this many texts, length-sorting each
+# window of inputs; results stream back once their whole window is done
+BATCH_PREDICT_SIZE = int(os.environ.get('CLASSIFIER_BATCH_PREDICT_SIZE', 32))
+BATCH_WINDOW = int(os.environ.get('CLASSIFIER_BATCH_WINDOW', 1024))
+
+# Results are cached by cleaned text and model version; set a cache path to
+# keep them across restarts
+CACHE_SIZE = int(os.environ.get('CLASSIFIER_CACHE_SIZE', 10000))
+CACHE_PATH = os.environ.get('CLASSIFIER_CACHE_PATH') or None
+
+# POST /reload needs this token in an X-Reload-Token header; without one set,
+# the endpoint is disabled
+RELOAD_TOKEN = os.environ.get('CLASSIFIER_RELOAD_TOKEN') or None
 
 # Initialize classifier
-classifier = NoticeClassifier()
+result_cache = ResultCache(CACHE_SIZE, CACHE_PATH)
+classifier = NoticeClassifier(cache=result_cache)
+# Results on disk from earlier model versions can never be hit again
+result_cache.invalidate(classifier.model_version)
+batcher = MicroBatcher(classifier.predict_batch, MAX_BATCH_SIZE, MAX_WAIT_MS)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -189,14 +159,111 @@ def predict():
         data = request.get_json()
         text = data.get('text', '')
         
+        if not isinstance(text, str):
+            return jsonify({"error": "text must be a string"}), 400
         if not text:
             return jsonify({"error": "No text provided"}), 400
         
-        predictions = classifier.predict(text)
+        predictions = batcher.predict(text)
         return jsonify({"predictions": predictions})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _ndjson_items(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def _batch_items():
+    """Entries of a /predict/batch body: a JSON list (or {"texts": [...]}) or NDJSON lines"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return _ndjson_items(request.stream)
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('texts')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON list of texts, {"texts": [...]} or NDJSON')
+    return data
+
+def _text_of(item):
+    """The text of one entry: a string or {"text": ...}; None if its NDJSON line was invalid"""
+    if item is None:
+        return None
+    if isinstance(item, dict):
+        item = item.get('text')
+    return item if isinstance(item, str) else ''
+
+def _predict_window(first_index, texts):
+    valid = [i for i, text in enumerate(texts) if text]
+    predictions = {}
+    if valid:  # a window of only bad lines needs no model call
+        predictions = dict(zip(valid, classifier.predict_many([texts[i] for i in valid], BATCH_PREDICT_SIZE)))
+    for i, text in enumerate(texts):
+        row = {"index": first_index + i}
+        if i in predictions:
+            row["predictions"] = predictions[i]
+        else:
+            row["error"] = "Invalid JSON" if text is None else "No text provided"
+        yield json.dumps(row) + "\n"
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Classify many texts in one request. Results stream back as NDJSON, one
+    {"index", "predictions"} (or {"index", "error"}) line per input, in input order.
+    """
+    try:
+        items = _batch_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        window, first_index = [], 0
+        try:
+            for item in items:
+                window.append(_text_of(item))
+                if len(window) >= BATCH_WINDOW:
+                    yield from _predict_window(first_index, window)
+                    first_index += len(window)
+                    window = []
+            if window:
+                yield from _predict_window(first_index, window)
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/reload', methods=['POST'])
+def reload_model():
+    """Load the model files again (e.g. after a new export) and drop cached results"""
+    global classifier
+    # No localhost fallback: behind a reverse proxy every request comes from 127.0.0.1
+    if not RELOAD_TOKEN:
+        return jsonify({"error": "Reloading is disabled; set CLASSIFIER_RELOAD_TOKEN to enable it"}), 403
+    if not hmac.compare_digest(request.headers.get('X-Reload-Token', '').encode(), RELOAD_TOKEN.encode()):
+        return jsonify({"error": "Not allowed to reload the model"}), 403
+    try:
+        replacement = NoticeClassifier(cache=result_cache)
+    except Exception as e:
+        return jsonify({"error": f"Reload failed, still serving the previous model: {e}"}), 500
+    classifier = replacement
+    batcher.predict_batch = replacement.predict_batch
+    result_cache.invalidate(replacement.model_version)
+    return jsonify({"backend": replacement.backend, "modelVersion": replacement.model_version})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "backend": classifier.backend,
+        "modelVersion": classifier.model_version,
+        "batcher": batcher.stats(),
+        "cache": result_cache.stats()
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Throughput/latency curves for the /predict micro-batcher.
+
+Drives MicroBatcher from N concurrent client threads and reports predictions
+per second and p50/p95 latency per concurrency level, for unbatched inference
+(max batch size 1) and for each batch size given.
+
+Usage (from AI-ML-Flask/src):
+    python bench_micro_batching.py [--concurrency 1 2 4 8 16 32] [--batch-sizes 1 8 16 32]
+                                   [--max-wait-ms 10] [--requests 256]
+    python bench_micro_batching.py --synthetic [--fixed-ms 40 --per-item-ms 4]
+
+By default the real NoticeClassifier is loaded on the CLASSIFIER_BACKEND
+runtime, so it needs the model files. --synthetic replaces the forward pass
+with a sleep of fixed-ms + per-item-ms * batch size to exercise the batcher
+alone.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from micro_batcher import MicroBatcher
+
+SAMPLE_TEXTS = [
+    "Mid-semester examinations for all B.Tech second year students will begin on Monday.",
+    "The hostel fee for the next semester must be paid before the 15th to avoid a late fine.",
+    "Placement drive: a software company is visiting campus for final year CSE and ECE students.",
+    "The library will remain closed on Saturday for annual stock verification.",
+    "All students are requested to submit their scholarship forms to the academic section."
+]
+
+
+def synthetic_model(fixed_ms, per_item_ms):
+    lock = threading.Lock()  # one forward pass at a time, like a saturated CPU
+
+    def predict_batch(texts, top_k=3):
+        with lock:
+            time.sleep((fixed_ms + per_item_ms * len(texts)) / 1000)
+        return [[{"label": "synthetic", "confidence": 1.0}] for _ in texts]
+    return predict_batch
+
+
+def run(predict_batch, batch_size, max_wait_ms, concurrency, requests):
+    batcher = MicroBatcher(predict_batch, batch_size, max_wait_ms)
+    latencies = []
+
+    def call(index):
+        started = time.perf_counter()
+        batcher.predict(SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)])
+        latencies.append(time.perf_counter() - started)
+
+    batcher.predict(SAMPLE_TEXTS[0])  # warm up
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "mean_batch": batcher.stats()["meanBatchSize"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 16, 32])
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--synthetic', action='store_true', help="simulate the forward pass")
+    parser.add_argument('--fixed-ms', type=float, default=40, help="synthetic cost per forward pass")
+    parser.add_argument('--per-item-ms', type=float, default=4, help="synthetic cost per text in a batch")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        predict_batch = synthetic_model(args.fixed_ms, args.per_item_ms)
+    else:
+        from notice_classifier import NoticeClassifier
+        predict_batch = NoticeClassifier().predict_batch
+
+    print(f"{'batch':>5} {'clients':>7} {'pred/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'avg batch':>9}")
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            result = run(predict_batch, batch_size, args.max_wait_ms, concurrency, args.requests)
+            print(f"{batch_size:>5} {concurrency:>7} {result['throughput']:>8.1f} {result['p50']:>8.1f} "
+                  f"{result['p95']:>8.1f} {result['mean_batch']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-request preprocessing vs inference time for NoticeClassifier.
+
+For short to very long notices, times preprocessing before (three regex
+passes over the whole text, then BertTokenizer) and after (truncation-aware
+clean_text with precompiled regexes, then BertTokenizerFast), and unless
+--no-model the forward pass on the CLASSIFIER_BACKEND runtime.
+
+Usage (from AI-ML-Flask/src):
+    python bench_preprocessing.py [--repeat 50] [--no-model]
+"""
+import argparse
+import re
+import statistics
+import time
+from transformers import BertTokenizer, BertTokenizerFast
+from notice_classifier import NoticeClassifier, MAX_LENGTH
+
+PARAGRAPH = (
+    "The mid-semester examinations for all B.Tech second year students will begin on 12 March.\n\n"
+    "Students must carry their identity cards & admit cards (issued by the exam cell) to every paper; "
+    "anyone without them will not be allowed into the hall!\t Seating plans are on the notice board. "
+)
+SAMPLES = {
+    "short": PARAGRAPH[:200],
+    "medium": PARAGRAPH * 8,
+    "long": PARAGRAPH * 40,
+    "very long": PARAGRAPH * 400
+}
+
+
+def legacy_clean_text(text):
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?\-]', '', text)
+    return text.strip()
+
+
+def timed(fn, repeat):
+    """Median milliseconds per call, and the last result"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--no-model', action='store_true', help="time preprocessing only")
+    args = parser.parse_args()
+
+    slow_tokenizer = BertTokenizer.from_pretrained('model_tokenizer')
+    fast_tokenizer = BertTokenizerFast.from_pretrained('model_tokenizer')
+    classifier = None if args.no_model else NoticeClassifier()
+    clean_text = (classifier or NoticeClassifier.__new__(NoticeClassifier)).clean_text
+
+    def tokenize(tokenizer, text):
+        return tokenizer([text], truncation=True, max_length=MAX_LENGTH, padding=True, return_tensors="np")
+
+    print(f"median ms per request over {args.repeat} runs")
+    print(f"{'':>18} {'--- before ---':>21} {'--- after ---':>21}")
+    print(f"{'input':>10} {'chars':>7} {'clean':>10} {'tokenize':>10} {'clean':>10} {'tokenize':>10} "
+          f"{'inference':>9} {'preproc share':>13}")
+    for name, text in SAMPLES.items():
+        old_clean_ms, old_cleaned = timed(lambda: legacy_clean_text(text), args.repeat)
+        clean_ms, cleaned = timed(lambda: clean_text(text), args.repeat)
+        slow_ms, _ = timed(lambda: tokenize(slow_tokenizer, old_cleaned), args.repeat)
+        fast_ms, _ = timed(lambda: tokenize(fast_tokenizer, cleaned), args.repeat)
+
+        inference = share = "-"
+        if classifier:
+            infer_ms, _ = timed(lambda: classifier._predict_cleaned([cleaned], 3), max(1, args.repeat // 5))
+            # _predict_cleaned tokenizes too; what remains is the forward pass
+            infer_ms = max(0.0, infer_ms - fast_ms)
+            inference = f"{infer_ms:.2f}"
+            share = f"{(clean_ms + fast_ms) / (clean_ms + fast_ms + infer_ms):.1%}"
+
+        print(f"{name:>10} {len(text):>7} {old_clean_ms:>10.3f} {slow_ms:>10.3f} {clean_ms:>10.3f} {fast_ms:>10.3f} "
+              f"{inference:>9} {share:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Accuracy-vs-latency report for the classifier backends.
+
+Runs each backend over a held-out CSV of labelled notices and reports accuracy,
+agreement with the fp32 model, single-request latency and batched throughput.
+Exits 1 if any backend loses more than --max-accuracy-drop accuracy against
+the fp32 model, so an export can be gated before it is deployed.
+
+Usage (from AI-ML-Flask/src, after export_model.py):
+    python evaluate_backends.py --data heldout.csv [--backends torch int8 onnx onnx:notice_classifier.int8.onnx]
+                                [--text-column text] [--label-column label] [--latency-samples 100]
+                                [--threads 1] [--max-accuracy-drop 0.01]
+
+A backend given as <backend>:<path>, e.g. onnx:<path>, loads its model from that file.
+"""
+import argparse
+import csv
+import statistics
+import sys
+import time
+import torch
+from notice_classifier import NoticeClassifier
+
+
+def load_heldout(path, text_column, label_column):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [(row[text_column], row[label_column]) for row in csv.DictReader(f) if row[text_column].strip()]
+    if not rows:
+        raise SystemExit(f"No labelled rows in {path}")
+    return [text for text, _ in rows], [label for _, label in rows]
+
+
+def load_backend(spec):
+    backend, _, path = spec.partition(':')
+    return NoticeClassifier(backend, model_path=path or None)
+
+
+def evaluate(classifier, texts, labels, latency_samples, batch_size):
+    latencies = []
+    for text in texts[:latency_samples]:
+        started = time.perf_counter()
+        classifier.predict(text, top_k=1)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    started = time.perf_counter()
+    predicted = [result[0]["label"] for result in classifier.predict_many(texts, batch_size, top_k=1)]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "predicted": predicted,
+        "accuracy": sum(p == label for p, label in zip(predicted, labels)) / len(labels),
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "throughput": len(texts) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', required=True, help="held-out CSV with text and label columns")
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'int8', 'onnx'])
+    parser.add_argument('--latency-samples', type=int, default=100, help="texts timed one request at a time")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None, help="torch intra-op threads (default: torch's)")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    texts, labels = load_heldout(args.data, args.text_column, args.label_column)
+    backends = args.backends if 'torch' in args.backends else ['torch', *args.backends]
+
+    results = {}
+    for spec in backends:
+        classifier = load_backend(spec)
+        results[spec] = evaluate(classifier, texts, labels, args.latency_samples, args.batch_size)
+        del classifier
+
+    baseline = results['torch']
+    print(f"{len(texts)} held-out notices, {min(args.latency_samples, len(texts))} timed one at a time\n")
+    print("| backend | accuracy | agreement with fp32 | p50 ms | p95 ms | texts/s (batched) | speed-up |")
+    print("|---|---|---|---|---|---|---|")
+    failures = []
+    for spec, result in results.items():
+        agreement = sum(a == b for a, b in zip(result["predicted"], baseline["predicted"])) / len(texts)
+        print(f"| {spec} | {result['accuracy']:.4f} | {agreement:.4f} | {result['p50']:.1f} | {result['p95']:.1f} "
+              f"| {result['throughput']:.1f} | {baseline['p50'] / result['p50']:.2f}x |")
+        if baseline["accuracy"] - result["accuracy"] > args.max_accuracy_drop:
+            failures.append(f"{spec} loses {baseline['accuracy'] - result['accuracy']:.4f} accuracy")
+
+    for failure in failures:
+        print(f"\nFAIL: {failure} (allowed {args.max_accuracy_drop})")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Export the trained classifier for CPU serving.
+
+Writes, from notice_classifier_model.pt:
+  --int8        a dynamically quantized (int8 Linear layers) PyTorch state dict,
+                served with CLASSIFIER_BACKEND=int8
+  --onnx        an ONNX model with dynamic batch and sequence axes, served with
+                CLASSIFIER_BACKEND=onnx
+  --onnx-int8   the ONNX model with its weights quantized to int8 by ONNX Runtime
+                (serve it by pointing CLASSIFIER_ONNX_MODEL_PATH at it)
+
+Usage (from AI-ML-Flask/src):
+    python export_model.py [--int8] [--onnx] [--onnx-int8]   # all three by default
+
+Check the exports with evaluate_backends.py before deploying them.
+"""
+import argparse
+import os
+import joblib
+import torch
+from transformers import BertTokenizerFast
+from notice_classifier import build_model, quantize, MODEL_PATH, INT8_MODEL_PATH, ONNX_MODEL_PATH
+
+ONNX_INPUTS = ['input_ids', 'attention_mask', 'token_type_ids']
+
+
+def export_int8(model, path):
+    torch.save(quantize(model).state_dict(), path)
+
+
+def export_onnx(model, tokenizer, path):
+    sample = tokenizer(["Examination schedule for the second year"], return_tensors="pt")
+    model.config.return_dict = False  # trace a plain (logits,) tuple
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ONNX_INPUTS}
+    dynamic_axes['logits'] = {0: 'batch'}
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in ONNX_INPUTS),
+        path,
+        input_names=ONNX_INPUTS,
+        output_names=['logits'],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+        dynamo=False  # the TorchScript exporter, whose graphs ONNX Runtime's quantizer handles
+    )
+    model.config.return_dict = True
+
+
+def export_onnx_int8(onnx_path, path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(onnx_path, path, weight_type=QuantType.QInt8)
+
+
+def size_mb(path):
+    return os.path.getsize(path) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--int8', action='store_true', help=f"write {INT8_MODEL_PATH}")
+    parser.add_argument('--onnx', action='store_true', help=f"write {ONNX_MODEL_PATH}")
+    parser.add_argument('--onnx-int8', action='store_true', help="write the int8 ONNX model")
+    parser.add_argument('--onnx-int8-path', default=ONNX_MODEL_PATH.replace('.onnx', '.int8.onnx'))
+    args = parser.parse_args()
+    if not (args.int8 or args.onnx or args.onnx_int8):
+        args.int8 = args.onnx = args.onnx_int8 = True
+
+    tokenizer = BertTokenizerFast.from_pretrained('model_tokenizer')
+    num_labels = len(joblib.load('label_encoder.joblib').classes_)
+    print(f"fp32 model: {MODEL_PATH} ({size_mb(MODEL_PATH):.0f} MB)")
+
+    model = build_model(num_labels)
+    if args.onnx or args.onnx_int8:
+        export_onnx(model, tokenizer, ONNX_MODEL_PATH)
+        print(f"onnx model: {ONNX_MODEL_PATH} ({size_mb(ONNX_MODEL_PATH):.0f} MB)")
+    if args.onnx_int8:
+        export_onnx_int8(ONNX_MODEL_PATH, args.onnx_int8_path)
+        print(f"onnx int8 model: {args.onnx_int8_path} ({size_mb(args.onnx_int8_path):.0f} MB)")
+    if args.int8:
+        export_int8(model, INT8_MODEL_PATH)
+        print(f"int8 model: {INT8_MODEL_PATH} ({size_mb(INT8_MODEL_PATH):.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text predictions into batched forward passes.
+
+    Each `predict` call queues its text and blocks on a Future. A worker thread
+    takes the first waiting text, keeps collecting until `max_batch_size` texts
+    are queued or `max_wait_ms` has passed since that first one, runs
+    `predict_batch` once for the whole batch and hands every caller its own
+    result (or the batch's exception).
+    """
+
+    def __init__(self, predict_batch, max_batch_size=16, max_wait_ms=10):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def predict(self, text, top_k=3, timeout=None):
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, top_k, future))
+        return future.result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # One forward pass per top_k; callers almost always use the default
+            by_top_k = {}
+            for item in batch:
+                by_top_k.setdefault(item[1], []).append(item)
+            for top_k, items in by_top_k.items():
+                try:
+                    results = self.predict_batch([text for text, _, _ in items], top_k=top_k)
+                except Exception:
+                    # Retry one at a time, so only the text that fails gets the error
+                    self._run_individually(items, top_k)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._largest = max(self._largest, len(batch))
+
+    def _run_individually(self, items, top_k):
+        for text, _, future in items:
+            try:
+                future.set_result(self.predict_batch([text], top_k=top_k)[0])
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000,
+                "batches": self._batches,
+                "predictions": self._items,
+                "meanBatchSize": round(self._items / self._batches, 2) if self._batches else 0,
+                "largestBatch": self._largest,
+                "queued": self._queue.qsize()
+            }
@@ -0,0 +1,179 @@
+import torch
+from transformers import BertTokenizerFast, BertForSequenceClassification
+import hashlib
+import joblib
+import re
+import os
+from result_cache import cache_key
+
+# Which runtime serves predictions:
+#   torch - the fp32 PyTorch model (notice_classifier_model.pt)
+#   int8  - the dynamically quantized PyTorch model written by export_model.py
+#   onnx  - an ONNX Runtime model written by export_model.py
+BACKENDS = ('torch', 'int8', 'onnx')
+BACKEND = os.environ.get('CLASSIFIER_BACKEND', 'torch')
+
+MODEL_PATH = os.environ.get('CLASSIFIER_MODEL_PATH', 'notice_classifier_model.pt')
+INT8_MODEL_PATH = os.environ.get('CLASSIFIER_INT8_MODEL_PATH', 'notice_classifier_int8.pt')
+ONNX_MODEL_PATH = os.environ.get('CLASSIFIER_ONNX_MODEL_PATH', 'notice_classifier.onnx')
+# Identifies the loaded weights in cached results; derived from the model file if unset
+MODEL_VERSION = os.environ.get('CLASSIFIER_MODEL_VERSION')
+
+MAX_LENGTH = 512  # BERT's token window; longer inputs are truncated
+
+WHITESPACE = re.compile(r'\s+')
+DISALLOWED_CHARS = re.compile(r'[^\w\s.,!?\-]')
+CLEAN_CHUNK_CHARS = 2048
+
+
+def build_model(num_labels, weights_path=MODEL_PATH, device='cpu'):
+    """The fp32 classifier in eval mode, with the trained weights unless `weights_path` is None"""
+    model = BertForSequenceClassification.from_pretrained(
+        "bert-base-uncased",
+        num_labels=num_labels,
+        ignore_mismatched_sizes=True
+    )
+    if weights_path:
+        model.load_state_dict(torch.load(weights_path, map_location=device))
+    model.to(device)
+    model.eval()
+    return model
+
+
+def quantize(model):
+    """Dynamic int8 quantization of the Linear layers (CPU only)"""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class NoticeClassifier:
+    def __init__(self, backend=None, cache=None, model_path=None):
+        """`model_path` overrides the backend's model file from the environment"""
+        self.backend = backend or BACKEND
+        self.cache = cache
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown classifier backend {self.backend!r}; expected one of {', '.join(BACKENDS)}")
+        # Quantized kernels and ONNX Runtime's CPU provider only run on CPU
+        gpu = self.backend == 'torch' and torch.cuda.is_available()
+        self.device = torch.device('cuda' if gpu else 'cpu')
+
+        # Load the Rust-backed tokenizer (same vocabulary and ids as BertTokenizer)
+        self.tokenizer = BertTokenizerFast.from_pretrained('model_tokenizer')
+
+        # Load label encoder
+        self.label_encoder = joblib.load('label_encoder.joblib')
+        self.class_names = list(self.label_encoder.classes_)
+
+        self.model = None
+        self.session = None
+        if self.backend == 'torch':
+            model_path = model_path or MODEL_PATH
+            self.model = build_model(len(self.class_names), model_path, self.device)
+        elif self.backend == 'int8':
+            model_path = model_path or INT8_MODEL_PATH
+            # Rebuild the quantized module structure, then load its saved int8 weights
+            self.model = quantize(build_model(len(self.class_names), weights_path=None))
+            self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
+        else:
+            import onnxruntime
+            model_path = model_path or ONNX_MODEL_PATH
+            self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+            self.onnx_inputs = [node.name for node in self.session.get_inputs()]
+        self.model_version = MODEL_VERSION or self._file_version(model_path)
+
+    def _file_version(self, path):
+        """Changes whenever the model file is replaced, without reading all of it"""
+        stat = os.stat(path)
+        identity = f"{self.backend}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+    def clean_text(self, text, max_words=MAX_LENGTH):
+        """
+        Collapse whitespace and drop unsupported characters. Long texts are
+        cleaned a chunk at a time, stopping once `max_words` words are kept:
+        every word is at least one token, so the rest would be truncated anyway.
+        """
+        pieces, words, start = [], 0, 0
+        while start < len(text) and words < max_words:
+            end = min(start + CLEAN_CHUNK_CHARS, len(text))
+            # Cut where a whitespace run starts, so no word or run spans two chunks
+            while end < len(text) and not (text[end].isspace() and not text[end - 1].isspace()):
+                end += 1
+            piece = DISALLOWED_CHARS.sub('', WHITESPACE.sub(' ', text[start:end]))
+            pieces.append(piece)
+            words += len(piece.split())
+            start = end
+        return ''.join(pieces).strip()
+
+    def predict(self, text, top_k=3):
+        return self.predict_batch([text], top_k)[0]
+
+    def _probabilities(self, texts):
+        if self.session is not None:
+            inputs = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=MAX_LENGTH)
+            feed = {name: inputs[name].astype('int64') for name in self.onnx_inputs}
+            logits = torch.from_numpy(self.session.run(None, feed)[0])
+        else:
+            inputs = self.tokenizer(
+                texts,
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=MAX_LENGTH
+            ).to(self.device)
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+        return torch.nn.functional.softmax(logits, dim=1)
+
+    def predict_batch(self, texts, top_k=3):
+        """Classify several texts with one forward pass, padded to the longest"""
+        return self._predict_cleaned([self.clean_text(text) for text in texts], top_k)
+
+    def _predict_cleaned(self, texts, top_k):
+        """Predictions for cleaned texts, running the model only on texts not cached"""
+        if self.cache is None:
+            return self._run_model(texts, top_k)
+
+        keys = [cache_key(self.model_version, text, top_k) for text in texts]
+        results = self.cache.get_many(keys)
+        missing = {}
+        for key, text, result in zip(keys, texts, results):
+            if result is None:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, self._run_model(list(missing.values()), top_k)))
+            self.cache.put_many(self.model_version, computed)
+            results = [computed[key] if result is None else result for key, result in zip(keys, results)]
+        return results
+
+    def _run_model(self, texts, top_k):
+        probs = self._probabilities(texts)
+
+        top_probs, top_indices = torch.topk(probs, k=top_k)
+        results = []
+        for row_probs, row_indices in zip(top_probs.tolist(), top_indices.tolist()):
+            results.append([
+                {"label": self.class_names[index], "confidence": round(prob, 4)}
+                for prob, index in zip(row_probs, row_indices)
+            ])
+
+        return results
+
+    def predict_many(self, texts, batch_size=32, top_k=3):
+        """
+        Classify any number of texts, batching texts of similar token length
+        together so little of each forward pass is padding. Results are
+        returned in input order.
+        """
+        if not texts:
+            return []  # the tokenizer rejects an empty batch
+        cleaned = [self.clean_text(text) for text in texts]
+        encoded = self.tokenizer(cleaned, truncation=True, max_length=MAX_LENGTH)
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+
+        results = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            for index, result in zip(indices, self._predict_cleaned([cleaned[i] for i in indices], top_k)):
+                results[index] = result
+        return results
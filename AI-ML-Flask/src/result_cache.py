@@ -0,0 +1,111 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def cache_key(model_version, text, top_k):
+    """Key of a cleaned text's predictions under one model version"""
+    return hashlib.sha256(f"{model_version}\0{top_k}\0{text}".encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU of classifier results, optionally backed by a SQLite file
+    that survives restarts. Entries record the model version that produced
+    them; `invalidate` drops everything from other versions and makes its
+    version the current one, after which results of any other version (e.g.
+    from a batch still running on the old model) are not stored.
+    """
+
+    def __init__(self, max_entries=10000, disk_path=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self.model_version = None
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, model_version TEXT, value TEXT)"
+            )
+            self._db.commit()
+
+    def get_many(self, keys):
+        """Cached values for `keys` (None where missing), promoting disk hits into memory"""
+        with self._lock:
+            values = []
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                values.append(value)
+
+            missing = [key for key, value in zip(keys, values) if value is None]
+            found = {}
+            if missing and self._db is not None:
+                placeholders = ','.join('?' * len(missing))
+                rows = self._db.execute(f"SELECT key, value FROM results WHERE key IN ({placeholders})", missing)
+                found = {key: json.loads(value) for key, value in rows}
+                for key, value in found.items():
+                    self._remember(key, value)
+
+            for index, key in enumerate(keys):
+                if values[index] is not None:
+                    self._hits += 1
+                elif key in found:
+                    values[index] = found[key]
+                    self._disk_hits += 1
+                else:
+                    self._misses += 1
+            return values
+
+    def put_many(self, model_version, items):
+        """Store {key: value} computed by `model_version`, unless that version is outdated"""
+        with self._lock:
+            if self.model_version is not None and model_version != self.model_version:
+                return
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, model_version, value) VALUES (?, ?, ?)",
+                    [(key, model_version, json.dumps(value)) for key, value in items.items()]
+                )
+                self._db.commit()
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, model_version):
+        """Forget every result not produced by `model_version`, the current version from now on"""
+        with self._lock:
+            self.model_version = model_version
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results WHERE model_version != ?", (model_version,))
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            stats = {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self._hits,
+                "diskHits": self._disk_hits,
+                "misses": self._misses,
+                "hitRatio": round((self._hits + self._disk_hits) / lookups, 4) if lookups else None
+            }
+            if self._db is not None:
+                stats["diskEntries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return stats
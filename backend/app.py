@@ -66,6 +66,16 @@ def create_app():
 
     # app.register_blueprint(notification_bp)
 
+    # Chunks a stopped worker never sent would otherwise stay queued in the ledger forever
+    from app.utils.delivery_ledger import DeliveryLedger
+    DeliveryLedger().expire_abandoned()
+
+    # Replay read receipts that a dead worker left buffered, without waiting for the next read
+    from config import Config
+    if Config.READ_BUFFER_ENABLED:
+        from app.utils.read_buffer import read_buffer
+        read_buffer.start()
+
     @app.route("/")
     def hello():
         return "WELCOME TO AWS BACKEND"
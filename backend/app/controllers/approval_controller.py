@@ -4,6 +4,7 @@ from datetime import datetime
 from ..models.notice_model import Notice
 from ..models.user_model import User
 from ..middleware.auth_middleware import token_required
+from ..utils import inbox
 
 
 from ..models.approval_model import Approval
@@ -35,6 +36,7 @@ def request_approval(current_user):
                 approval_status="approved",
                 status="published"
             )
+            inbox.schedule_sync(notice.id)
             return jsonify({"message": "No approvers found, notice approved automatically"}), 200
             
         # Create approval records for each approver
@@ -54,6 +56,7 @@ def request_approval(current_user):
             approval_status="pending",
             status="pending_approval"
         )
+        inbox.schedule_sync(notice.id)
         
         return jsonify({
             "message": "Approval requested successfully",
@@ -117,8 +120,10 @@ def approve_notice(current_user, approval_id):
             rejected_approvals = Approval.objects(notice_id=approval.notice_id, status="rejected").count()
             if rejected_approvals > 0:
                 notice.update(approval_status="rejected", status="rejected")
+                inbox.schedule_sync(notice.id)
             else:
                 notice.update(approval_status="approved", status="published")
+                inbox.schedule_sync(notice.id)
                 
         return jsonify({"message": "Notice approved successfully"}), 200
     except Exception as e:
@@ -152,6 +157,7 @@ def reject_notice(current_user, approval_id):
             status="rejected",
             rejection_reason=reason
         )
+        inbox.schedule_sync(notice.id)
         
         return jsonify({"message": "Notice rejected"}), 200
     except Exception as e:
@@ -189,8 +195,10 @@ def sign_approval(current_user, approval_id):
             rejected_approvals = Approval.objects(notice_id=approval.notice_id, status="rejected").count()
             if rejected_approvals > 0:
                 notice.update(approval_status="rejected", status="rejected")
+                inbox.schedule_sync(notice.id)
             else:
                 notice.update(approval_status="approved", status="published")
+                inbox.schedule_sync(notice.id)
                 
         return jsonify({
             "message": "Approval signed successfully",
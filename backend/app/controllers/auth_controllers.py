@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 import datetime
 from bson import ObjectId
 from ..models.user_model import User
 from config import Config
 from ..models.student_model import Student
-from ..middleware.auth_middleware import token_required
+from ..middleware.auth_middleware import token_required, role_required
+from ..middleware.principal_cache import principal_cache_stats
+from ..middleware.token_cache import token_cache_stats
+from ..utils.password_pool import PasswordPoolBusy, hash_password, verify_password, password_hasher
 from ..models.employee_model import Employee
 from app import app
 
@@ -33,7 +35,7 @@ def signup():
             return jsonify({"error": "Email already exists"}), 400
 
         # Create new user
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = hash_password(data['password'])
         user = User(
             name=data['name'],
             email=data['email'],
@@ -52,6 +54,8 @@ def signup():
             }
         }), 201
 
+    except PasswordPoolBusy as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -67,7 +71,7 @@ def login():
 
         user = User.objects(email=data['email']).first()
 
-        if not user or not check_password_hash(user.password, data['password']):
+        if not user or not verify_password(user.password, data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
 
         # Verify that the provided role matches the user's actual role
@@ -99,6 +103,8 @@ def login():
             }
         }), 200
 
+    except PasswordPoolBusy as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -113,7 +119,7 @@ def login_student():
 
         student = Student.objects(univ_roll_no=data['univ_roll_no']).first()
 
-        if not student or not check_password_hash(student.password, data['password']):
+        if not student or not verify_password(student.password, data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
 
         # Generate tokens
@@ -145,6 +151,8 @@ def login_student():
             }
         }), 200
 
+    except PasswordPoolBusy as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -165,7 +173,7 @@ def login_employee():
 
         # Verify password - this will handle the scrypt hash from your example
     # Only checks hashed password
-        if not employee.check_password(data['password']):
+        if not verify_password(employee.password, data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
 
         # Generate tokens
@@ -197,6 +205,8 @@ def login_employee():
             }
         }), 200
 
+    except PasswordPoolBusy as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -251,6 +261,27 @@ def get_current_user(current_user):
         return jsonify({"error": str(e)}), 500
 
 
+@auth_bp.route("/principal-cache", methods=["GET"])
+@token_required
+@role_required(['academic', 'admin'])
+def get_principal_cache_stats(current_user):
+    return jsonify(principal_cache_stats()), 200
+
+
+@auth_bp.route("/token-cache", methods=["GET"])
+@token_required
+@role_required(['academic', 'admin'])
+def get_token_cache_stats(current_user):
+    return jsonify(token_cache_stats()), 200
+
+
+@auth_bp.route("/password-pool", methods=["GET"])
+@token_required
+@role_required(['academic', 'admin'])
+def get_password_pool_stats(current_user):
+    return jsonify(password_hasher.stats()), 200
+
+
 @auth_bp.route("/logout", methods=["POST"])
 def logout():
     return jsonify({"message": "Logged out successfully"}), 200
@@ -1,32 +1,52 @@
 from flask import Blueprint, request, jsonify, send_file,current_app
 from bson import ObjectId
+from mongoengine.queryset.visitor import Q
 import datetime
 import json
 import os
 from werkzeug.utils import secure_filename
 from ..models.notice_model import Notice
-from ..models.user_model import User
+from ..models.notice_read_model import NoticeRead
+from ..models.inbox_model import InboxEntry
+from ..models.email_delivery_model import EmailDelivery
 from ..models.student_model import Student
 from ..middleware.auth_middleware import token_required, role_required
-from ..utils.email_send_function import send_bulk_email
-from ..models.employee_model import Employee
+from ..utils.email_send_function import queue_bulk_email, email_dispatcher
+from ..utils.creator_cache import resolve_creators, creator_payload
+from ..utils.delivery_ledger import delivery_summary, job_summary
+from ..utils.read_buffer import read_buffer
+from ..utils.audience import reader_audience_keys
+from ..utils import inbox
+from ..utils.notice_analytics import InvalidDateRange, parse_date_range, notice_analytics
+from ..utils.pagination import InvalidCursor, parse_limit, keyset_page, paginated_response
+from config import Config
 # from ..models.notification_model import Notification
 # from ..extensions import socketio
 
 notice_bp = Blueprint('notices', __name__, url_prefix='/api/notices')
 
+# Fields served by the notice feed; never pull the unbounded reads/recipient lists
+NOTICE_FEED_FIELDS = (
+    'id', 'title', 'subject', 'content', 'notice_type', 'departments', 'program_course',
+    'specialization', 'year', 'section', 'priority', 'status', 'publish_at', 'created_at',
+    'read_count', 'created_by'
+)
+
 @notice_bp.route("", methods=["GET"])
 @token_required
 # @role_required(['admin'])  # Only admins can access this endpoint
 def get_notices(current_user):
     try:
-        notices = Notice.objects().order_by('-created_at')
-        user_map = {str(user.id): user for user in User.objects.only('id', 'name', 'email')}
-        
-        notices_data = []
-        for notice in notices:
-            creator = user_map.get(notice.created_by)
-            notices_data.append({
+        limit = parse_limit(request.args.get('limit'))
+        notices, next_cursor = keyset_page(
+            Notice.objects().only(*NOTICE_FEED_FIELDS),
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+        creators = resolve_creators(notice.created_by for notice in notices)
+
+        def serialize(notice):
+            return {
                 "id": str(notice.id),
                 "title": notice.title,
                 "subject": notice.subject,
@@ -42,15 +62,13 @@ def get_notices(current_user):
                 "publishAt": notice.publish_at.isoformat() if notice.publish_at else None,
                 "createdAt": notice.created_at.isoformat(),
                 "readCount": notice.read_count,
-                "createdBy": {
-                    "id": notice.created_by,
-                    "name": creator.name if creator else "Unknown",
-                    "email": creator.email if creator else ""
-                }
-            })
-            
-        return jsonify(notices_data), 200
-        
+                "createdBy": creator_payload(creators, notice.created_by)
+            }
+
+        return paginated_response(notices, serialize, next_cursor)
+
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -82,6 +100,28 @@ def create_notice(current_user):
                     filename = secure_filename(file.filename)
                     attachments.append(filename)
 
+        # Resolve selected students and the course/branch/year/section criteria as one query
+        target_students = json.loads(form_data.get('target_students', '[]'))
+        target_query = None
+        selected_ids = [ObjectId(student_id) for student_id in target_students if ObjectId.is_valid(str(student_id))]
+        if selected_ids:
+            target_query = Q(id__in=selected_ids)
+        if target_course and target_department:
+            student_query = {
+                'course': target_course,
+                'branch': target_department
+            }
+            if target_year:
+                student_query['year'] = target_year
+            if target_section:
+                student_query['section'] = target_section
+            target_query = Q(**student_query) if target_query is None else target_query | Q(**student_query)
+
+        if target_query is not None:
+            recipient_emails.update(
+                email for email in Student.objects(target_query).distinct('official_email') if email
+            )
+
         # Create notice
         notice = Notice(
             title=form_data.get('title'),
@@ -97,54 +137,30 @@ def create_notice(current_user):
             send_options=json.loads(form_data.get('send_options', '{"email": false, "web": true}')),
             status=form_data.get('status', 'draft'),
             created_by=str(current_user.id),
-            attachments=attachments
+            attachments=attachments,
+            audience_students=selected_ids
         ).save()
 
-        # Get selected students from form
-        target_students = json.loads(form_data.get('target_students', '[]'))
-        
-        # Add notice to selected students
-        for student_id in target_students:
-            student = Student.objects(id=student_id).first()
-            if student:
-                student.update(push__notices=notice)
-                if student.official_email:
-                    recipient_emails.add(student.official_email)
-
-        # Also add notice to students matching the general criteria
-        if target_course and target_department:
-            student_query = {
-                'course': target_course,
-                'branch': target_department
-            }
-            if target_year:
-                student_query['year'] = target_year
-            if target_section:
-                student_query['section'] = target_section
-                
-            matching_students = Student.objects(**student_query)
-            for student in matching_students:
-                if str(student.id) not in target_students:  # Don't duplicate if already selected
-                    student.update(push__notices=notice)
-                    if student.official_email:
-                        recipient_emails.add(student.official_email)
-
-        # Update recipient emails in notice if new ones were added
-        notice.update(set__recipient_emails=list(recipient_emails))
-
-        # Send emails if needed
+        # Delivery is by audience (see utils/audience.py), so publishing writes nothing per student
+        student_target_count = Student.objects(target_query).count() if target_query is not None else 0
+        inbox.schedule_sync(notice.id)
+
+        # Send emails if needed (delivered in the background)
+        email_job_id = None
         if notice.status == 'published' and notice.send_options.get('email') and notice.recipient_emails:
-            send_bulk_email(
+            email_job_id = queue_bulk_email(
                 recipient_emails=notice.recipient_emails,
                 subject=notice.subject or notice.title,
-                body=notice.content
+                body=notice.content,
+                notice_id=notice.id
             )
         
         return jsonify({
             "message": "Notice created and distributed successfully",
             "noticeId": str(notice.id),
             "recipientCount": len(recipient_emails),
-            "studentTargetCount": Student.objects(notices=notice).count()
+            "studentTargetCount": student_target_count,
+            "emailJobId": email_job_id
         }), 201
         
     except Exception as e:
@@ -158,29 +174,20 @@ def create_notice(current_user):
 @token_required
 def get_my_notices(current_user):
     try:
-        # Determine user type and fetch their document
-        if hasattr(current_user, 'univ_roll_no'):  # Student
-            user = Student.objects(id=current_user.id).only('notices').first()
-        else:  # Employee
-            user = Employee.objects(id=current_user.id).only('notices').first()
-            
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        # Extract just the Notice IDs from the user's notices list
-        notice_ids = [notice.id for notice in user.notices]
+        if Config.INBOX_ENABLED:
+            return get_my_inbox(current_user)
 
-        # Get all notices for this user (sorted by creation date)
-        notices = Notice.objects(id__in=notice_ids).order_by('-created_at')
+        # A reader's feed is every notice addressed to one of their audiences
+        notices = Notice.objects(audience_keys__in=reader_audience_keys(current_user)) \
+            .exclude('reads', 'recipient_emails') \
+            .order_by('-created_at')
         
         # Get creator information in bulk for efficiency
-        creator_ids = list({notice.created_by for notice in notices})
-        creators = {str(user.id): user for user in User.objects(id__in=creator_ids).only('id', 'name', 'email')}
+        creators = resolve_creators(notice.created_by for notice in notices)
         
         # Prepare response data
         notices_data = []
         for notice in notices:
-            creator = creators.get(notice.created_by)
             notices_data.append({
                 "id": str(notice.id),
                 "title": notice.title,
@@ -189,11 +196,7 @@ def get_my_notices(current_user):
                 "priority": notice.priority.lower(),
                 "createdAt": notice.created_at.isoformat(),
                 "attachments": notice.attachments or [],
-                "createdBy": {
-                    "id": notice.created_by,
-                    "name": creator.name if creator else "Unknown",
-                    "email": creator.email if creator else ""
-                },
+                "createdBy": creator_payload(creators, notice.created_by),
                 "departments": notice.departments,
                 "programCourse": notice.program_course,
                 "year": notice.year,
@@ -203,20 +206,78 @@ def get_my_notices(current_user):
         
         return jsonify(notices_data), 200
         
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in get_my_notices: {str(e)}")
         return jsonify({"error": "Failed to fetch notices", "details": str(e)}), 500
     
 
+def get_my_inbox(current_user):
+    """Serve GET /my from the materialized inbox: one indexed range scan per page"""
+    entries, next_cursor = keyset_page(
+        InboxEntry.objects(student_id=ObjectId(current_user.id)).exclude('generation'),
+        cursor=request.args.get('cursor'),
+        limit=parse_limit(request.args.get('limit'))
+    )
+
+    def serialize(entry):
+        return {
+            "id": str(entry.notice_id),
+            "title": entry.title,
+            "content": entry.content,
+            "noticeType": entry.notice_type,
+            "priority": (entry.priority or "Normal").lower(),
+            "createdAt": entry.created_at.isoformat(),
+            "attachments": entry.attachments or [],
+            "createdBy": entry.created_by,
+            "departments": entry.departments,
+            "programCourse": entry.program_course,
+            "year": entry.year,
+            "section": entry.section,
+            "status": entry.status,
+            "read": entry.read
+        }
+
+    return paginated_response(entries, serialize, next_cursor)
+    
+
+@notice_bp.route("/email-jobs/<job_id>", methods=["GET"])
+@token_required
+def get_email_job(current_user, job_id):
+    # The ledger is shared by all workers; jobs without a notice are only tracked in memory
+    job = job_summary(job_id) or email_dispatcher.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Email job not found"}), 404
+    return jsonify(job), 200
+
+@notice_bp.route("/delivery-metrics", methods=["GET"])
+@token_required
+@role_required(['academic', 'admin'])
+def get_delivery_metrics(current_user):
+    return jsonify(email_dispatcher.get_metrics()), 200
+
+@notice_bp.route("/<notice_id>/delivery", methods=["GET"])
+@token_required
+@role_required(['academic', 'admin'])
+def get_notice_delivery(current_user, notice_id):
+    try:
+        if not ObjectId.is_valid(notice_id) or not Notice.objects(id=notice_id).only('id').first():
+            return jsonify({"error": "Notice not found"}), 404
+        summary, chunks = delivery_summary(ObjectId(notice_id))
+        return jsonify({"noticeId": notice_id, "summary": summary, "chunks": chunks}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @notice_bp.route("/<notice_id>", methods=["GET"])
 @token_required
 def get_notice(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id)).first()
+        notice = Notice.objects(id=ObjectId(notice_id)).exclude('reads').first()
         if not notice:
             return jsonify({"error": "Notice not found"}), 404
         
-        creator = User.objects(id=ObjectId(notice.created_by)).first()
+        creators = resolve_creators([notice.created_by])
         
         return jsonify({
             "id": str(notice.id),
@@ -237,11 +298,7 @@ def get_notice(current_user, notice_id):
             "createdAt": notice.created_at.isoformat(),
             "updatedAt": notice.updated_at.isoformat(),
             "readCount": notice.read_count,
-            "createdBy": {
-                "id": notice.created_by,
-                "name": creator.name if creator else "Unknown",
-                "email": creator.email if creator else ""
-            },
+            "createdBy": creator_payload(creators, notice.created_by),
             "attachments": notice.attachments
         }), 200
         
@@ -283,16 +340,19 @@ def update_notice(current_user, notice_id):
 
         notice.updated_at = datetime.datetime.now()
         notice.save()
+        inbox.schedule_sync(notice.id)
         
-        # Send email if the notice is published and has recipients
+        # Send email if the notice is published and has recipients (delivered in the background)
+        email_job_id = None
         if notice.status == 'published' and notice.send_options.get('email') and notice.recipient_emails:
-            send_bulk_email(
+            email_job_id = queue_bulk_email(
                 recipient_emails=notice.recipient_emails,
                 subject=notice.subject or notice.title,
-                body=notice.content
+                body=notice.content,
+                notice_id=notice.id
             )
         
-        return jsonify({"message": "Notice updated successfully"}), 200
+        return jsonify({"message": "Notice updated successfully", "emailJobId": email_job_id}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -305,7 +365,10 @@ def delete_notice(current_user, notice_id):
         if not notice:
             return jsonify({"error": "Notice is not there"}), 404
             
+        NoticeRead.objects(notice_id=notice.id).delete()
+        EmailDelivery.objects(notice_id=notice.id).delete()
         notice.delete()
+        inbox.schedule_removal(notice.id)
         return jsonify({"message": "Notice deleted successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -314,48 +377,43 @@ def delete_notice(current_user, notice_id):
 @token_required
 def mark_notice_read(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id)).first()
+        if not ObjectId.is_valid(notice_id):
+            return jsonify({"error": "Notice not found"}), 404
+        notice = Notice.objects(id=ObjectId(notice_id)).only('id').first()
         if not notice:
             return jsonify({"error": "Notice not found"}), 404
 
-        user_id = str(current_user.id)
-        now = datetime.datetime.utcnow()
+        if Config.READ_BUFFER_ENABLED:
+            # Buffered and bulk-written in the background; only indexed lookups here.
+            # isNewRead is best effort: another worker may hold an unflushed read too.
+            buffered_first = read_buffer.add(notice.id, str(current_user.id))
+            is_new_read = buffered_first and not NoticeRead.objects(
+                notice_id=notice.id, user_id=str(current_user.id)
+            ).only('id').first()
+            return jsonify({
+                "message": "First read recorded" if is_new_read else "Read timestamp updated",
+                "isNewRead": bool(is_new_read),
+                "queued": True
+            }), 202
 
-        # Check if user already read this notice
-        existing_read = next((read for read in notice.reads if read.get('user_id') == user_id), None)
+        # Single upsert tells us whether this is the user's first read
+        now = datetime.datetime.utcnow()
+        is_new_read = NoticeRead.record(notice.id, str(current_user.id), now)
+        inbox.mark_read({(notice.id, str(current_user.id)): (now, now, 1)})
 
-        if existing_read:
-            # Update existing read timestamp
-            notice.update(
-                pull__reads={"user_id": user_id}
-            )
-            notice.update(
-                push__reads={
-                    "user_id": user_id,
-                    "timestamp": now,
-                    "is_first_read": False
-                }
-            )
-            return jsonify({
-                "message": "Read timestamp updated",
-                "isNewRead": False
-            }), 200
-        else:
-            # Add new read record
-            notice.update(
-                push__reads={
-                    "user_id": user_id,
-                    "timestamp": now,
-                    "is_first_read": True
-                }
-            )
+        if is_new_read:
             # Increment unique read count
-            notice.update(inc__read_count=1)
+            Notice.objects(id=notice.id).update_one(inc__read_count=1)
             return jsonify({
                 "message": "First read recorded",
                 "isNewRead": True
             }), 200
 
+        return jsonify({
+            "message": "Read timestamp updated",
+            "isNewRead": False
+        }), 200
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -364,41 +422,37 @@ def mark_notice_read(current_user, notice_id):
 # @role_required(['academic'])
 def get_notice_reads(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id)).first()
+        notice = Notice.objects(id=ObjectId(notice_id)).only('id').first()
         if not notice:
             return jsonify({"error": "Notice not found"}), 404
 
-        # Get user details for each read
-        user_ids = list({read['user_id'] for read in notice.reads})  # Get unique user IDs
-        users = User.objects(id__in=user_ids)
-        user_map = {str(user.id): user for user in users}
+        reads = list(
+            NoticeRead.objects(notice_id=notice.id)
+            .only('user_id', 'read_count', 'last_read_at')
+            .order_by('-last_read_at')
+        )
 
-        # Count reads per user
-        read_counts = {}
-        for read in notice.reads:
-            user_id = read['user_id']
-            read_counts[user_id] = read_counts.get(user_id, 0) + 1
+        # Get user details for each reader
+        user_map = resolve_creators(read.user_id for read in reads)
 
         reads_data = []
-        for user_id, count in read_counts.items():
-            user = user_map.get(user_id)
+        for read in reads:
+            user = creator_payload(user_map, read.user_id)
             reads_data.append({
-                "user_id": user_id,
-                "user_name": user.name if user else "Unknown",
-                "user_email": user.email if user else "",
-                "roll_number": getattr(user, 'roll_number', 'null'),
-                "department": getattr(user, 'department', 'null'),
-                "course": getattr(user, 'course', 'null'),
-                "section": getattr(user, 'section', 'null'),
-                "read_count": count,
-                "last_read": max(
-                    [read['timestamp'] for read in notice.reads if read['user_id'] == user_id]
-                ).isoformat() if notice.reads else None
+                "user_id": read.user_id,
+                "user_name": user["name"],
+                "user_email": user["email"],
+                "roll_number": 'null',
+                "department": 'null',
+                "course": 'null',
+                "section": 'null',
+                "read_count": read.read_count,
+                "last_read": read.last_read_at.isoformat() if read.last_read_at else None
             })
 
         return jsonify({
-            "total_reads": len(notice.reads),
-            "unique_readers": notice.read_count,
+            "total_reads": sum(read.read_count for read in reads),
+            "unique_readers": len(reads),
             "reads": reads_data
         }), 200
 
@@ -432,14 +486,10 @@ def get_notice_analytics(current_user, notice_id):
 @role_required(['academic'])
 def get_all_notices_analytics(current_user):
     try:
-        total_notices = Notice.objects.count()
-        total_reads = sum(notice.read_count for notice in Notice.objects())
-        
-        return jsonify({
-            "totalNotices": total_notices,
-            "totalReads": total_reads,
-        }), 200
-        
+        start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+        return jsonify(notice_analytics(start, end)), 200
+    except InvalidDateRange as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -451,13 +501,12 @@ def get_notices_by_creator(current_user, user_id):
         if current_user.role != "academic" and str(current_user.id) != user_id:
             return jsonify({"error": "Unauthorized"}), 403
 
-        notices = Notice.objects(created_by=user_id).order_by('-created_at')
+        notices = Notice.objects(created_by=user_id).exclude('reads').order_by('-created_at')
         
-        user_map = {str(user.id): user for user in User.objects.only('id', 'name', 'email')}
+        creators = resolve_creators([user_id])
         
         notices_data = []
         for notice in notices:
-            creator = user_map.get(notice.created_by)
             notices_data.append({
                 "id": str(notice.id),
                 "title": notice.title,
@@ -472,11 +521,7 @@ def get_notices_by_creator(current_user, user_id):
                 "publish_at": notice.publish_at.isoformat() if notice.publish_at else None,
                 "created_at": notice.created_at.isoformat(),
                 "updated_at": notice.updated_at.isoformat(),
-                "created_by": {
-                    "id": notice.created_by,
-                    "name": creator.name if creator else "Unknown",
-                    "email": creator.email if creator else ""
-                },
+                "created_by": creator_payload(creators, notice.created_by),
                 "attachments": notice.attachments
             })
             
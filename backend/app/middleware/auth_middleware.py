@@ -1,12 +1,8 @@
 from functools import wraps
 from flask import jsonify, request
 import jwt
-from bson import ObjectId
-from ..models.user_model import User
-from ..models.student_model import Student
-from ..models.employee_model import Employee
-from config import Config
-from datetime import datetime
+from .principal_cache import load_principal
+from .token_cache import verify_token
 
 def token_required(f):
     @wraps(f)
@@ -28,26 +24,17 @@ def token_required(f):
             }), 401
             
         try:
-            # Decode token and verify
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-            
-            # Check token expiration
-            if 'exp' not in data or datetime.utcnow() > datetime.utcfromtimestamp(data['exp']):
+            # Verify signature and expiry (memoized per token until it expires)
+            data = verify_token(token)
+            if data is None:
                 return jsonify({
                     'status': 'error',
                     'message': 'Token has expired!',
                     'code': 'TOKEN_EXPIRED'
                 }), 401
                 
-            # Find user based on role in token
-            user = None
-            if data.get('role') == 'student':
-                user = Student.objects(id=ObjectId(data['user_id'])).first()
-            elif data.get('role') == 'employee':
-                user = Employee.objects(id=ObjectId(data['user_id'])).first()
-            else:
-                # Fallback to User model for backward compatibility
-                user = User.objects(id=ObjectId(data['user_id'])).first()
+            # Find user based on role in token (roles other than student/employee are Users)
+            user = load_principal(data.get('role'), data['user_id'])
             
             if not user:
                 return jsonify({
@@ -145,7 +132,7 @@ def student_only(f):
     @token_required
     def decorated(*args, **kwargs):
         current_user = kwargs.get('current_user')
-        if not isinstance(current_user, Student):
+        if getattr(current_user, 'kind', None) != 'student':
             return jsonify({
                 'status': 'error',
                 'message': 'This route is for students only!',
@@ -159,7 +146,7 @@ def employee_only(f):
     @token_required
     def decorated(*args, **kwargs):
         current_user = kwargs.get('current_user')
-        if not isinstance(current_user, Employee):
+        if getattr(current_user, 'kind', None) != 'employee':
             return jsonify({
                 'status': 'error',
                 'message': 'This route is for employees only!',
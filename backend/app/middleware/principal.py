@@ -0,0 +1,68 @@
+from bson import ObjectId
+from ..models.user_model import User
+from ..models.student_model import Student
+from ..models.employee_model import Employee
+
+# Token roles that have their own collection; any other role is a User
+PRINCIPAL_MODELS = {'student': Student, 'employee': Employee, 'user': User}
+
+# What authentication, role checks and audience matching read
+PRINCIPAL_FIELDS = ('id', 'role', 'name', 'email', 'department', 'branch', 'course', 'year', 'section')
+
+
+def principal_kind(role):
+    return role if role in ('student', 'employee') else 'user'
+
+
+def load_principal_fields(kind, user_id):
+    """Projected principal fields of one user, or None if there is no such user"""
+    model = PRINCIPAL_MODELS[kind]
+    fields = [name for name in PRINCIPAL_FIELDS if name in model._fields]
+    son = model.objects(id=ObjectId(user_id)).only(*fields).as_pymongo().first()
+    if son is None:
+        return None
+    projected = dict.fromkeys(PRINCIPAL_FIELDS)
+    for name in fields:
+        field = model._fields[name]
+        if field.db_field in son:
+            projected[name] = field.to_python(son[field.db_field])
+        else:
+            projected[name] = field.default() if callable(field.default) else field.default
+    return projected
+
+
+class Principal:
+    """
+    The authenticated user as seen by request handlers.
+
+    Carries only PRINCIPAL_FIELDS (fields a model lacks are None). Any other
+    attribute loads the full Student/Employee/User document on first access,
+    once per request.
+    """
+
+    def __init__(self, kind, fields):
+        self.kind = kind
+        self._document = None
+        self.__dict__.update(fields)
+
+    @property
+    def model(self):
+        return PRINCIPAL_MODELS[self.kind]
+
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = self.model.objects(id=self.id).first()
+        return self._document
+
+    def __getattr__(self, name):
+        # Only reached for attributes outside the projection
+        if name.startswith('_'):
+            raise AttributeError(name)
+        document = self.document
+        if document is None:
+            raise AttributeError(f"{self.model.__name__} {self.id} no longer exists")
+        return getattr(document, name)
+
+    def __repr__(self):
+        return f"<Principal {self.kind} {self.id}>"
@@ -0,0 +1,48 @@
+from mongoengine import signals
+from ..utils.ttl_cache import TTLCache
+from .principal import PRINCIPAL_MODELS, Principal, principal_kind, load_principal_fields
+from config import Config
+
+# Projected principal fields by (kind, user_id); each request wraps them in
+# its own Principal, so a lazily loaded full document is never shared
+_principals = TTLCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL)
+
+
+def load_principal(role, user_id):
+    """The user a token belongs to, from the cache or a slim projection query"""
+    kind = principal_kind(role)
+    key = (kind, str(user_id))
+    fields = _principals.get(key)
+    if fields is None:
+        fields = load_principal_fields(kind, user_id)
+        # Unknown users are not cached, so a newly created account works immediately
+        if fields is None:
+            return None
+        _principals.set(key, fields)
+    return Principal(kind, fields)
+
+
+def invalidate_principal(role, user_id):
+    """Call after changing a user's profile, role or password outside Document.save()"""
+    _principals.invalidate((principal_kind(role), str(user_id)))
+
+
+def clear_principals():
+    _principals.clear()
+
+
+def principal_cache_stats():
+    return _principals.stats()
+
+
+def _invalidator(kind):
+    def _on_changed(sender, document, **kwargs):
+        _principals.invalidate((kind, str(document.id)))
+    return _on_changed
+
+
+# Receivers are held weakly by blinker, so keep references to them
+_receivers = {kind: _invalidator(kind) for kind in PRINCIPAL_MODELS}
+for _kind, _model in PRINCIPAL_MODELS.items():
+    signals.post_save.connect(_receivers[_kind], sender=_model)
+    signals.post_delete.connect(_receivers[_kind], sender=_model)
@@ -0,0 +1,35 @@
+import hashlib
+import time
+import jwt
+from ..utils.ttl_cache import TTLCache
+from config import Config
+
+# Claims of already-verified access tokens by SHA-256 of the token; each entry
+# expires at the token's own exp
+_verified = TTLCache(maxsize=Config.TOKEN_CACHE_SIZE, ttl=0)
+
+
+def verify_token(token):
+    """
+    Claims of a valid HS256 access token, or None if it has no exp or is past it.
+    Raises jwt.InvalidTokenError (and subclasses) like jwt.decode.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    data = _verified.get(key)
+    if data is not None:
+        return data
+
+    data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+    remaining = data['exp'] - time.time() if 'exp' in data else 0
+    if remaining <= 0:
+        return None
+    _verified.set(key, data, ttl=remaining)
+    return data
+
+
+def clear_tokens():
+    _verified.clear()
+
+
+def token_cache_stats():
+    return _verified.stats()
@@ -13,8 +13,8 @@ class Approval(Document):
     meta = {
         'collection': 'approvals',
         'indexes': [
-            'notice_id',
-            'approver_id',
+            {'fields': ['notice_id', 'status']},
+            {'fields': ['approver_id', '-created_at']},
             'status',
             {'fields': ['notice_id', 'approver_id'], 'unique': True}
         ]
@@ -0,0 +1,42 @@
+from mongoengine import Document, StringField, IntField, FloatField, DateTimeField, ListField, ReferenceField
+import datetime
+
+
+class EmailDelivery(Document):
+    """Ledger row for one recipient chunk of a notice's email dispatch job"""
+    notice_id = ReferenceField('Notice')
+    job_id = StringField(required=True)
+    chunk_index = IntField(required=True)
+    recipient_count = IntField(default=0)
+    status = StringField(choices=['queued', 'sent', 'failed'], default='queued')
+    attempts = IntField(default=0)
+    smtp_code = IntField()
+    smtp_message = StringField()
+    refused = ListField(StringField(), default=[])  # recipients rejected within a sent chunk
+    queued_at = DateTimeField(default=datetime.datetime.utcnow)
+    finished_at = DateTimeField()
+    latency_ms = FloatField()  # last attempt, connection checkout through DATA reply
+
+    meta = {
+        'collection': 'email_deliveries',
+        'indexes': [
+            {'fields': ['job_id', 'chunk_index'], 'unique': True},
+            {'fields': ['notice_id', '-queued_at']},
+            {'fields': ['status', 'queued_at']}  # start-up sweep of abandoned chunks
+        ]
+    }
+
+    def to_dict(self):
+        return {
+            "jobId": self.job_id,
+            "chunk": self.chunk_index,
+            "recipients": self.recipient_count,
+            "status": self.status,
+            "attempts": self.attempts,
+            "smtpCode": self.smtp_code,
+            "smtpMessage": self.smtp_message,
+            "refused": self.refused,
+            "queuedAt": self.queued_at.isoformat() if self.queued_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "latencyMs": self.latency_ms
+        }
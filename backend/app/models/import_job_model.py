@@ -0,0 +1,46 @@
+from mongoengine import Document, StringField, IntField, DateTimeField, ListField
+import datetime
+
+
+class ImportJob(Document):
+    """Progress of a background student roster import (see utils/import_jobs.py)"""
+    status = StringField(choices=['queued', 'running', 'completed', 'failed'], default='queued')
+    filename = StringField()
+    department = StringField()
+    course = StringField()
+    year = StringField()
+    section = StringField()
+    created_by = StringField()
+    rows_processed = IntField(default=0)
+    created = IntField(default=0)
+    errored = IntField(default=0)
+    errors = ListField(StringField(), default=[])  # the first IMPORT_JOB_MAX_ERRORS row errors
+    message = StringField()
+    failure = StringField()  # why the job failed, if it did
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+    started_at = DateTimeField()
+    finished_at = DateTimeField()
+
+    meta = {
+        'collection': 'import_jobs',
+        'indexes': [{'fields': ['-created_at']}]
+    }
+
+    def to_dict(self):
+        started = self.started_at
+        elapsed = ((self.finished_at or datetime.datetime.utcnow()) - started).total_seconds() if started else 0
+        return {
+            "jobId": str(self.id),
+            "status": self.status,
+            "filename": self.filename,
+            "rowsProcessed": self.rows_processed,
+            "created": self.created,
+            "errored": self.errored,
+            "errors": self.errors,
+            "rowsPerSecond": round(self.rows_processed / elapsed, 1) if elapsed > 0 else None,
+            "message": self.message,
+            "failure": self.failure,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "startedAt": started.isoformat() if started else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None
+        }
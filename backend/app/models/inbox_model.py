@@ -0,0 +1,35 @@
+from mongoengine import Document, StringField, IntField, ListField, DateTimeField, DictField, BooleanField, ObjectIdField
+
+
+class InboxEntry(Document):
+    """
+    Materialized (student, notice) row holding exactly what GET /api/notices/my
+    returns, so a student's inbox is one indexed range scan.
+    Maintained by utils/inbox.py.
+    """
+    student_id = ObjectIdField(required=True)
+    notice_id = ObjectIdField(required=True)
+    created_at = DateTimeField(required=True)  # the notice's, used for ordering
+    title = StringField()
+    content = StringField()
+    notice_type = StringField()
+    priority = StringField()
+    status = StringField()
+    attachments = ListField(StringField(), default=[])
+    created_by = DictField()
+    departments = ListField(StringField(), default=[])
+    program_course = StringField()
+    year = StringField()
+    section = StringField()
+    read = BooleanField(default=False)
+    read_at = DateTimeField()
+    generation = IntField()  # the notice's inbox generation that last wrote this row
+
+    meta = {
+        'collection': 'inbox',
+        'indexes': [
+            {'fields': ['student_id', 'notice_id'], 'unique': True},
+            {'fields': ['student_id', '-created_at', '-id']},
+            {'fields': ['notice_id', 'generation']}
+        ]
+    }
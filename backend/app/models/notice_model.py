@@ -1,4 +1,5 @@
-from mongoengine import connect, Document, EmbeddedDocument, EmbeddedDocumentField, StringField, DictField, ListField, DateTimeField, EmailField, IntField, BooleanField, ReferenceField
+from mongoengine import connect, Document, EmbeddedDocument, EmbeddedDocumentField, StringField, DictField, ListField, DateTimeField, EmailField, IntField, BooleanField, ReferenceField, ObjectIdField
+from ..utils.audience import notice_audience_keys
 
 import datetime
 
@@ -37,7 +38,9 @@ class Notice(Document):
     updated_at = DateTimeField(default=datetime.datetime.now)
     created_by = StringField(required=True)
     attachments = ListField(StringField(), default=[])
-    reads = ListField(DictField(), default=[])
+    audience_students = ListField(ObjectIdField(), default=[])  # Explicitly selected students
+    audience_keys = ListField(StringField(), default=[])  # Derived in clean(); see utils/audience.py
+    reads = ListField(DictField(), default=[])  # Legacy; read receipts now live in notice_reads
     read_count = IntField(default=0)
     requires_approval = BooleanField(default=False)
     approval_workflow = ListField(ReferenceField(Approval))
@@ -47,18 +50,28 @@ class Notice(Document):
         default="not_required"
     )
     rejection_reason = StringField()
+    inbox_generation = IntField(default=0)  # last inbox sync started; see utils/inbox.py
+    inbox_synced_generation = IntField(default=0)  # newest inbox sync finished
     
     meta = {
         'collection': 'notices',
         'indexes': [
-            '-created_at',
+            {'fields': ['-created_at', '-id']},  # keyset pagination of the notice feed
+            {'fields': ['audience_keys', '-created_at']},  # student feeds
+            {'fields': ['created_by', '-created_at']},  # notices by creator
+            'approval_workflow',
             'notice_type',
             'status',
             'departments',
             'year',
-            'reads.user_id',
             'priority',
             'section',
             'program_course',
         ]
-    }
\ No newline at end of file
+    }
+
+    def clean(self):
+        """Keep the audience keys in step with the targeting fields on every save"""
+        self.audience_keys = notice_audience_keys(
+            self.departments, self.program_course, self.year, self.section, self.audience_students
+        )
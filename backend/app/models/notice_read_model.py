@@ -0,0 +1,106 @@
+from mongoengine import Document, StringField, ReferenceField, DateTimeField, IntField, ListField
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import datetime
+
+
+class NoticeRead(Document):
+    """One row per (notice, reader); replaces the embedded Notice.reads list"""
+    notice_id = ReferenceField('Notice', required=True)
+    user_id = StringField(required=True)
+    first_read_at = DateTimeField(default=datetime.datetime.utcnow)
+    last_read_at = DateTimeField(default=datetime.datetime.utcnow)
+    read_count = IntField(default=1)
+    applied_batches = ListField(StringField(), default=[])  # recent read buffer batches, see record_many
+
+    # A replayed batch arrives soon after the crash that interrupted it; only
+    # the most recent batch ids of each row need keeping to recognise it
+    APPLIED_BATCHES_KEPT = 20
+
+    meta = {
+        'collection': 'notice_reads',
+        'indexes': [
+            {'fields': ['notice_id', 'user_id'], 'unique': True},
+            {'fields': ['notice_id', '-last_read_at']},
+            'user_id',
+            'first_read_at'
+        ]
+    }
+
+    @classmethod
+    def record(cls, notice_id, user_id, timestamp=None):
+        """
+        Atomically upsert a read of `notice_id` by `user_id`.
+        Returns True when this is the user's first read of the notice.
+        """
+        now = timestamp or datetime.datetime.utcnow()
+        query = {'notice_id': notice_id, 'user_id': user_id}
+        update = {
+            '$setOnInsert': {'first_read_at': now},
+            '$set': {'last_read_at': now},
+            '$inc': {'read_count': 1}
+        }
+        collection = cls._get_collection()
+        try:
+            previous = collection.find_one_and_update(query, update, projection={'_id': 1}, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent first read won the insert; ours is now a repeat read
+            previous = collection.find_one_and_update(query, update, projection={'_id': 1})
+        return previous is None
+
+    @classmethod
+    def record_many(cls, reads, batch_id=None):
+        """
+        Apply coalesced reads {(notice_id, user_id): (first_read_at, last_read_at, count)}
+        with one unordered bulk upsert. Returns (notice ids that gained a new reader,
+        keys whose writes failed and should be retried).
+
+        With a `batch_id`, rows that already applied that batch are left alone,
+        so writing the same batch again never double counts.
+        """
+        keys = list(reads)
+        operations = []
+        for notice_id, user_id in keys:
+            first, last, count = reads[(notice_id, user_id)]
+            query = {'notice_id': notice_id, 'user_id': user_id}
+            update = {
+                '$min': {'first_read_at': first},
+                '$max': {'last_read_at': last},
+                '$inc': {'read_count': count}
+            }
+            if batch_id:
+                query['applied_batches'] = {'$ne': batch_id}
+                update['$push'] = {'applied_batches': {'$each': [batch_id], '$slice': -cls.APPLIED_BATCHES_KEPT}}
+            operations.append(UpdateOne(query, update, upsert=True))
+        if not operations:
+            return set(), []
+
+        collection = cls._get_collection()
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            upserted, failed = result.upserted_ids, []
+        except BulkWriteError as e:
+            upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
+            failed = [keys[error['index']] for error in e.details.get('writeErrors', [])]
+            if batch_id and failed:
+                # A row holding the batch makes the query miss and the upsert collide:
+                # that key is already applied. Every other key failed.
+                failed = [
+                    key for key in failed
+                    if not collection.count_documents({'notice_id': key[0], 'user_id': key[1],
+                                                       'applied_batches': batch_id}, limit=1)
+                ]
+
+        return {keys[index][0] for index in upserted}, failed
+
+    @classmethod
+    def reader_counts(cls, notice_ids):
+        """Number of distinct readers for each of `notice_ids`"""
+        pipeline = [
+            {'$match': {'notice_id': {'$in': list(notice_ids)}}},
+            {'$group': {'_id': '$notice_id', 'readers': {'$sum': 1}}}
+        ]
+        counts = {notice_id: 0 for notice_id in notice_ids}
+        for row in cls._get_collection().aggregate(pipeline):
+            counts[row['_id']] = row['readers']
+        return counts
@@ -50,13 +50,13 @@ class Student(Document):
     password = StringField(required=True)
     raw_password = StringField()
     created_at = DateTimeField(default=datetime.datetime.utcnow)
-    notices = ListField(ReferenceField('Notice'))
+    notices = ListField(ReferenceField('Notice'))  # Legacy; feeds now come from Notice.audience_keys
     
     meta = {
         'collection': 'students',
         'indexes': [
             'univ_roll_no',
-            'course',
+            {'fields': ['course', 'branch', 'year', 'section']},  # notice targeting
             'branch',
             'year', # <<-- ADD THIS
             'section', # <<-- ADD THIS
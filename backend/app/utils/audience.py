@@ -0,0 +1,55 @@
+"""
+Audience keys let a student's notice feed be answered by one indexed query.
+
+A notice stores the keys of every audience it targets: one per explicitly
+selected recipient and one per course/department cohort (year and section
+may be wildcards). A reader's keys are every audience they belong to, so
+`Notice.objects(audience_keys__in=reader_keys)` is their feed.
+"""
+
+WILDCARD = '*'
+
+
+def recipient_key(recipient_id):
+    return f"id:{recipient_id}"
+
+
+def cohort_key(course, department, year=None, section=None):
+    return f"cohort:{course}|{department}|{year or WILDCARD}|{section or WILDCARD}"
+
+
+def notice_audience_keys(departments, course, year=None, section=None, recipient_ids=()):
+    keys = [recipient_key(recipient_id) for recipient_id in recipient_ids]
+    # Cohort targeting needs both a course and a department, as it always has
+    if course:
+        keys.extend(cohort_key(course, department, year, section) for department in departments if department)
+    return list(dict.fromkeys(keys))
+
+
+def reader_audience_keys(user):
+    keys = [recipient_key(user.id)]
+    course = getattr(user, 'course', None)
+    branch = getattr(user, 'branch', None)
+    if course and branch:
+        for year in (getattr(user, 'year', None), None):
+            for section in (getattr(user, 'section', None), None):
+                keys.append(cohort_key(course, branch, year, section))
+    return list(dict.fromkeys(keys))
+
+
+def audience_student_filter(notice):
+    """MongoDB filter on the students collection matching everyone a notice targets"""
+    clauses = []
+    if notice.audience_students:
+        clauses.append({'_id': {'$in': list(notice.audience_students)}})
+    if notice.program_course:
+        for department in notice.departments or []:
+            if not department:
+                continue
+            cohort = {'course': notice.program_course, 'branch': department}
+            if notice.year:
+                cohort['year'] = notice.year
+            if notice.section:
+                cohort['section'] = notice.section
+            clauses.append(cohort)
+    return {'$or': clauses} if clauses else None
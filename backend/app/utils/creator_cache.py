@@ -0,0 +1,50 @@
+from bson import ObjectId
+from mongoengine import signals
+from ..models.user_model import User
+from .ttl_cache import TTLCache
+from config import Config
+
+# Resolved creators by user id; None marks an id with no matching user
+_creators = TTLCache(maxsize=Config.CREATOR_CACHE_SIZE, ttl=Config.CREATOR_CACHE_TTL)
+
+
+def resolve_creators(user_ids):
+    """
+    Map each user id to its {"name", "email"} (or None if unknown), querying
+    only the ids that are not already cached.
+    """
+    ids = {str(user_id) for user_id in user_ids if user_id}
+    creators, missing = _creators.get_many(ids)
+
+    if missing:
+        lookup = [ObjectId(user_id) for user_id in missing if ObjectId.is_valid(user_id)]
+        fetched = {
+            str(user.id): {"name": user.name, "email": user.email}
+            for user in User.objects(id__in=lookup).only('id', 'name', 'email')
+        } if lookup else {}
+        for user_id in missing:
+            creators[user_id] = fetched.get(user_id)
+            _creators.set(user_id, creators[user_id])
+
+    return creators
+
+
+def creator_payload(creators, user_id):
+    creator = creators.get(user_id)
+    return {
+        "id": user_id,
+        "name": creator["name"] if creator else "Unknown",
+        "email": creator["email"] if creator else ""
+    }
+
+
+def invalidate_creator(user_id):
+    _creators.invalidate(str(user_id))
+
+
+def _on_user_changed(sender, document, **kwargs):
+    invalidate_creator(document.id)
+
+
+signals.post_save.connect(_on_user_changed, sender=User)
+signals.post_delete.connect(_on_user_changed, sender=User)
@@ -0,0 +1,129 @@
+import datetime
+import logging
+import os
+from ..models.email_delivery_model import EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+# The send queue lives in the sending worker's memory, so chunks still queued
+# when it stops are never sent. A chunk queued for longer than this (well past
+# the retry backoff) is taken to be one of those and recorded as failed.
+ABANDON_AFTER_SECONDS = int(os.environ.get("EMAIL_ABANDON_AFTER_SECONDS", 3600))
+ABANDONED_MESSAGE = "Abandoned: the worker sending this chunk stopped before delivering it"
+
+
+class DeliveryLedger:
+    """
+    Persists per-chunk delivery state for notice emails. Ledger failures are
+    logged and never interrupt sending.
+    """
+
+    def queued(self, notice_id, job_id, chunks):
+        now = datetime.datetime.utcnow()
+        try:
+            EmailDelivery._get_collection().insert_many([
+                {
+                    'notice_id': notice_id,
+                    'job_id': job_id,
+                    'chunk_index': index,
+                    'recipient_count': len(chunk),
+                    'status': 'queued',
+                    'attempts': 0,
+                    'refused': [],
+                    'queued_at': now
+                }
+                for index, chunk in enumerate(chunks)
+            ], ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to record queued email job {job_id}: {e}")
+
+    def finished(self, job_id, index, status, attempts, latency_ms, smtp_code=None, smtp_message=None, refused=()):
+        try:
+            EmailDelivery._get_collection().update_one(
+                {'job_id': job_id, 'chunk_index': index},
+                {'$set': {
+                    'status': status,
+                    'attempts': attempts,
+                    'latency_ms': round(latency_ms, 2),
+                    'smtp_code': smtp_code,
+                    'smtp_message': smtp_message,
+                    'refused': list(refused),
+                    'finished_at': datetime.datetime.utcnow()
+                }}
+            )
+        except Exception as e:
+            logger.error(f"Failed to record result of email job {job_id} chunk {index}: {e}")
+
+    def expire_abandoned(self, **scope):
+        """
+        Mark chunks queued longer than ABANDON_AFTER_SECONDS as failed, within
+        `scope` (e.g. job_id=...) or everywhere. Returns how many were marked.
+        A chunk that is in fact still sent later is overwritten by `finished`.
+        """
+        now = datetime.datetime.utcnow()
+        query = dict(scope, status='queued',
+                     queued_at={'$lt': now - datetime.timedelta(seconds=ABANDON_AFTER_SECONDS)})
+        try:
+            result = EmailDelivery._get_collection().update_many(query, {'$set': {
+                'status': 'failed',
+                'smtp_message': ABANDONED_MESSAGE,
+                'finished_at': now
+            }})
+        except Exception as e:
+            logger.error(f"Failed to expire abandoned email chunks: {e}")
+            return 0
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} abandoned email chunks as failed")
+        return result.modified_count
+
+
+def delivery_summary(notice_id):
+    """Per-chunk ledger of a notice's email jobs, newest first, with totals"""
+    DeliveryLedger().expire_abandoned(notice_id=notice_id)
+    deliveries = list(EmailDelivery.objects(notice_id=notice_id).order_by('-queued_at', 'chunk_index'))
+    summary = {"chunks": len(deliveries), "queued": 0, "sent": 0, "failed": 0,
+               "recipients": 0, "recipientsSent": 0, "recipientsFailed": 0}
+    for delivery in deliveries:
+        summary[delivery.status] += 1
+        summary["recipients"] += delivery.recipient_count
+        if delivery.status == 'sent':
+            summary["recipientsSent"] += delivery.recipient_count - len(delivery.refused)
+            summary["recipientsFailed"] += len(delivery.refused)
+        elif delivery.status == 'failed':
+            summary["recipientsFailed"] += delivery.recipient_count
+    return summary, [delivery.to_dict() for delivery in deliveries]
+
+
+def _timestamp(value):
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp() if value else None
+
+
+def job_summary(job_id):
+    """
+    Status of an email job from its ledger rows, in the dispatcher's job shape,
+    so any worker can answer for jobs sent by another. None if not recorded.
+    """
+    DeliveryLedger().expire_abandoned(job_id=job_id)
+    deliveries = list(EmailDelivery.objects(job_id=job_id).no_dereference().order_by('chunk_index'))
+    if not deliveries:
+        return None
+    sent = sum(1 for delivery in deliveries if delivery.status == 'sent')
+    failed = sum(1 for delivery in deliveries if delivery.status == 'failed')
+    if sent + failed < len(deliveries):
+        status = "sending" if sent + failed else "queued"
+        finished_at = None
+    else:
+        status = "sent" if not failed else ("failed" if not sent else "partial")
+        finished_at = max(_timestamp(delivery.finished_at) or 0 for delivery in deliveries) or None
+    notice_id = deliveries[0].notice_id  # a DBRef; the notice itself may be gone
+    return {
+        "id": job_id,
+        "noticeId": str(getattr(notice_id, 'id', notice_id)) if notice_id else None,
+        "status": status,
+        "recipients": sum(delivery.recipient_count for delivery in deliveries),
+        "chunks": len(deliveries),
+        "sentChunks": sent,
+        "failedChunks": failed,
+        "createdAt": _timestamp(deliveries[0].queued_at),
+        "finishedAt": finished_at
+    }
@@ -1,46 +1,402 @@
 import smtplib
+import logging
+import os # Import os to get credentials from environment variables
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
-import os # Import os to get credentials from environment variables
+from typing import List, Optional
+from .delivery_ledger import DeliveryLedger
+from .smtp_sink import SinkSMTP
+
+logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION ---
 # It's better to load sensitive data from environment variables
 EMAIL_SENDER_ADDRESS = os.environ.get("EMAIL_SENDER_ADDRESS", "team.smart.notice@gmail.com")
 EMAIL_SENDER_PASSWORD = os.environ.get("EMAIL_SENDER_PASSWORD", "sqbpaqxlstzrxabk") # Your App Password
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+
+# "smtp" delivers through SMTP_SERVER (a local aiosmtpd works with SMTP_STARTTLS=false);
+# "sink" accepts and discards mail in-process, for load tests and local development
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "smtp").lower()
+EMAIL_SINK_LATENCY_MS = float(os.environ.get("EMAIL_SINK_LATENCY_MS", 0))
+EMAIL_SINK_PER_RECIPIENT_MS = float(os.environ.get("EMAIL_SINK_PER_RECIPIENT_MS", 0))
+EMAIL_SINK_FAILURE_RATE = float(os.environ.get("EMAIL_SINK_FAILURE_RATE", 0))
+
+# Dispatch tuning: recipients per message (Gmail allows 100 per message), sender threads
+# (each keeps one authenticated connection open), retries per chunk and base backoff
+EMAIL_CHUNK_SIZE = int(os.environ.get("EMAIL_CHUNK_SIZE", 90))
+EMAIL_WORKERS = int(os.environ.get("EMAIL_WORKERS", 2))
+EMAIL_MAX_RETRIES = int(os.environ.get("EMAIL_MAX_RETRIES", 3))
+EMAIL_RETRY_BACKOFF = float(os.environ.get("EMAIL_RETRY_BACKOFF", 2.0))
+SMTP_MAX_IDLE_SECONDS = float(os.environ.get("SMTP_MAX_IDLE_SECONDS", 60))
 
-def send_bulk_email(recipient_emails: List[str], subject: str, body: str) -> bool:
-    if not all([EMAIL_SENDER_ADDRESS, EMAIL_SENDER_PASSWORD, recipient_emails]):
-        print("ERROR: Email credentials are not configured or recipient list is empty.")
-        return False
 
+def build_message(subject: str, body: str) -> str:
     message = MIMEMultipart()
     message["From"] = EMAIL_SENDER_ADDRESS
-    # Use Bcc to hide recipient emails from each other
-    message["Bcc"] = ", ".join(recipient_emails)
+    # Recipients travel only in the SMTP envelope so they stay hidden from each other
+    message["To"] = "undisclosed-recipients:;"
     message["Subject"] = subject
-    
+
     # Attach the body as HTML to preserve formatting from the RTE
     message.attach(MIMEText(body, "html"))
+    return message.as_string()
 
-    try:
-        print(f"Connecting to email server {SMTP_SERVER}...")
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+
+def chunk_recipients(recipient_emails: List[str], size: int = EMAIL_CHUNK_SIZE) -> List[List[str]]:
+    recipients = list(dict.fromkeys(email for email in recipient_emails if email))
+    return [recipients[start:start + size] for start in range(0, len(recipients), size)]
+
+
+def open_smtp_connection():
+    if EMAIL_BACKEND == "sink":
+        return SinkSMTP(EMAIL_SINK_LATENCY_MS, EMAIL_SINK_PER_RECIPIENT_MS, EMAIL_SINK_FAILURE_RATE)
+
+    logger.info(f"Connecting to email server {SMTP_SERVER}...")
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+    if SMTP_STARTTLS:
         server.starttls()
+    server.ehlo()
+    # Local test servers usually don't offer AUTH
+    if server.has_extn("auth"):
         server.login(EMAIL_SENDER_ADDRESS, EMAIL_SENDER_PASSWORD)
-        print(f"Sending email to {len(recipient_emails)} recipients...")
-        # Send to recipient_emails list directly
-        server.sendmail(EMAIL_SENDER_ADDRESS, recipient_emails, message.as_string())
-        print("✅ Email sent successfully!")
+    return server
+
+
+class SMTPConnectionPool:
+    """Long-lived authenticated SMTP connections shared by the sender threads"""
+
+    def __init__(self, factory=open_smtp_connection, max_idle=SMTP_MAX_IDLE_SECONDS):
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self):
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self.factory()
+                with self._lock:
+                    self.opened += 1
+                return connection
+            # Connections idle for a while may have been dropped by the server
+            if time.monotonic() - idle_since < self.max_idle or self._alive(connection):
+                with self._lock:
+                    self.reused += 1
+                return connection
+            self.discard(connection)
+
+    def release(self, connection):
+        self._idle.put((connection, time.monotonic()))
+
+    def discard(self, connection):
+        try:
+            connection.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _alive(connection):
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(connection)
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # 4xx refusals (rate limits, greylisting) are worth retrying
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(isinstance(code, int) and code >= 500 for code in codes)
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+
+def _sendmail(connection, recipients: List[str], message: str):
+    """smtplib's sendmail, but keeping the server's final DATA reply for the ledger"""
+    connection.ehlo_or_helo_if_needed()
+    code, reply = connection.mail(EMAIL_SENDER_ADDRESS)
+    if code != 250:
+        connection.rset()
+        raise smtplib.SMTPSenderRefused(code, reply, EMAIL_SENDER_ADDRESS)
+    refused = {}
+    for recipient in recipients:
+        code, reply = connection.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, reply)
+    if len(refused) == len(recipients):
+        connection.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    code, reply = connection.data(message)
+    if code != 250:
+        connection.rset()
+        raise smtplib.SMTPDataError(code, reply)
+    return code, reply.decode(errors="replace") if isinstance(reply, bytes) else reply, refused
+
+
+def deliver_chunk(pool: SMTPConnectionPool, recipients: List[str], message: str):
+    """
+    Send one chunk over a pooled connection; connection errors discard it.
+    Returns (smtp_code, smtp_message, refused recipients).
+    """
+    connection = pool.acquire()
+    try:
+        result = _sendmail(connection, recipients, message)
+    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+        # The server answered; the session itself is still usable
+        pool.release(connection)
+        raise
+    except Exception:
+        pool.discard(connection)
+        raise
+    pool.release(connection)
+    return result
+
+
+class DispatchMetrics:
+    """Rolling throughput and chunk-latency figures for the dispatcher"""
+
+    def __init__(self, window=60.0, samples=2000):
+        self.window = window
+        self._sent = deque(maxlen=samples)  # (finished_at, recipients, latency_ms)
+        self._lock = threading.Lock()
+        self.chunks_sent = 0
+        self.chunks_failed = 0
+        self.retries = 0
+        self.recipients_sent = 0
+
+    def record_sent(self, recipients, latency_ms):
+        with self._lock:
+            self._sent.append((time.monotonic(), recipients, latency_ms))
+            self.chunks_sent += 1
+            self.recipients_sent += recipients
+
+    def record_failed(self):
+        with self._lock:
+            self.chunks_failed += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @staticmethod
+    def _percentile(values, percentile):
+        if not values:
+            return None
+        ordered = sorted(values)
+        rank = min(len(ordered) - 1, max(0, int(round(percentile / 100 * len(ordered) + 0.5)) - 1))
+        return round(ordered[rank], 2)
+
+    def snapshot(self, pool=None, queue_depth=0):
+        with self._lock:
+            cutoff = time.monotonic() - self.window
+            recent = [sample for sample in self._sent if sample[0] >= cutoff]
+            latencies = [sample[2] for sample in self._sent]
+            data = {
+                "chunksSent": self.chunks_sent,
+                "chunksFailed": self.chunks_failed,
+                "retries": self.retries,
+                "recipientsSent": self.recipients_sent,
+                "windowSeconds": self.window,
+                "messagesPerSecond": round(len(recent) / self.window, 3),
+                "recipientsPerSecond": round(sum(sample[1] for sample in recent) / self.window, 3),
+                "chunkLatencyMs": {
+                    "p50": self._percentile(latencies, 50),
+                    "p95": self._percentile(latencies, 95)
+                },
+                "queueDepth": queue_depth
+            }
+        if pool is not None:
+            checkouts = pool.opened + pool.reused
+            data["connections"] = {
+                "opened": pool.opened,
+                "reused": pool.reused,
+                "reuseRate": round(pool.reused / checkouts, 4) if checkouts else 0.0
+            }
+        return data
+
+
+class EmailDispatcher:
+    """
+    Out-of-request email delivery. Each job is split into recipient chunks
+    that sender threads deliver over pooled connections, retrying transient
+    failures per chunk with exponential backoff.
+    """
+
+    def __init__(self, workers=EMAIL_WORKERS, chunk_size=EMAIL_CHUNK_SIZE, max_retries=EMAIL_MAX_RETRIES,
+                 backoff=EMAIL_RETRY_BACKOFF, pool=None, max_jobs=1000, ledger=None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool = pool or SMTPConnectionPool()
+        self.max_jobs = max_jobs
+        self.ledger = ledger
+        self.metrics = DispatchMetrics()
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Threads and sockets don't survive a fork; start fresh in this process
+            self._queue = queue.Queue()
+            self.pool = SMTPConnectionPool(self.pool.factory, self.pool.max_idle)
+            for index in range(self.workers):
+                threading.Thread(target=self._run, name=f"email-sender-{index}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, recipient_emails: List[str], subject: str, body: str, notice_id=None) -> Optional[str]:
+        """Queue a bulk email and return its job id (None if there is nothing to send)"""
+        if not all([EMAIL_SENDER_ADDRESS, EMAIL_SENDER_PASSWORD, recipient_emails]):
+            logger.error("Email credentials are not configured or recipient list is empty.")
+            return None
+
+        chunks = chunk_recipients(recipient_emails, self.chunk_size)
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "noticeId": str(notice_id) if notice_id else None,
+            "status": "queued",
+            "recipients": sum(len(chunk) for chunk in chunks),
+            "chunks": len(chunks),
+            "sentChunks": 0,
+            "failedChunks": 0,
+            "createdAt": time.time(),
+            "finishedAt": None
+        }
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+        if self.ledger and notice_id:
+            self.ledger.queued(notice_id, job_id, chunks)
+
+        self._ensure_started()
+        message = build_message(subject, body)
+        for index, chunk in enumerate(chunks):
+            self._queue.put((job_id, index, chunk, message, 0))
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """This process's view of a job; use delivery_ledger.job_summary to see other workers' jobs"""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self):
+        while True:
+            job_id, index, recipients, message, attempt = self._queue.get()
+            try:
+                self._send(job_id, index, recipients, message, attempt)
+            except Exception as e:
+                logger.error(f"Email sender crashed on job {job_id} chunk {index}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def get_metrics(self) -> dict:
+        return self.metrics.snapshot(self.pool, self._queue.qsize())
+
+    def _send(self, job_id, index, recipients, message, attempt):
+        started = time.perf_counter()
+        try:
+            code, reply, refused = deliver_chunk(self.pool, recipients, message)
+        except Exception as e:
+            latency_ms = (time.perf_counter() - started) * 1000
+            if attempt < self.max_retries and not _is_permanent(e):
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Chunk {index} of job {job_id} failed ({e}); retrying in {delay:.1f}s")
+                self.metrics.record_retry()
+                timer = threading.Timer(delay, self._queue.put, [(job_id, index, recipients, message, attempt + 1)])
+                timer.daemon = True
+                timer.start()
+                return
+            logger.error(f"❌ Chunk {index} of job {job_id} failed after {attempt + 1} attempts: {e}")
+            self.metrics.record_failed()
+            smtp_message = getattr(e, "smtp_error", None)
+            if isinstance(smtp_message, bytes):
+                smtp_message = smtp_message.decode(errors="replace")
+            self._finish_chunk(job_id, index, ok=False, attempts=attempt + 1, latency_ms=latency_ms,
+                               smtp_code=getattr(e, "smtp_code", None), smtp_message=smtp_message or str(e))
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record_sent(len(recipients) - len(refused), latency_ms)
+        self._finish_chunk(job_id, index, ok=True, attempts=attempt + 1, latency_ms=latency_ms,
+                           smtp_code=code, smtp_message=reply, refused=list(refused))
+
+    def _finish_chunk(self, job_id, index, ok, attempts, latency_ms, smtp_code=None, smtp_message=None, refused=()):
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if job and job["noticeId"] and self.ledger:
+            self.ledger.finished(job_id, index, "sent" if ok else "failed", attempts, latency_ms,
+                                 smtp_code, smtp_message, refused)
+
+        with self._jobs_lock:
+            if not job:
+                return
+            job["sentChunks" if ok else "failedChunks"] += 1
+            done = job["sentChunks"] + job["failedChunks"]
+            if done < job["chunks"]:
+                job["status"] = "sending"
+                return
+            job["finishedAt"] = time.time()
+            if not job["failedChunks"]:
+                job["status"] = "sent"
+            else:
+                job["status"] = "failed" if not job["sentChunks"] else "partial"
+        logger.info(f"✅ Email job {job_id} finished: {job['status']}")
+
+
+email_dispatcher = EmailDispatcher(ledger=DeliveryLedger())
+
+
+def queue_bulk_email(recipient_emails: List[str], subject: str, body: str, notice_id=None) -> Optional[str]:
+    """Send a bulk email in the background; returns the dispatch job id"""
+    return email_dispatcher.submit(recipient_emails, subject, body, notice_id=notice_id)
+
+
+def send_bulk_email(recipient_emails: List[str], subject: str, body: str) -> bool:
+    """Synchronous delivery on the calling thread, chunked over the shared connection pool"""
+    if not all([EMAIL_SENDER_ADDRESS, EMAIL_SENDER_PASSWORD, recipient_emails]):
+        logger.error("Email credentials are not configured or recipient list is empty.")
+        return False
+
+    message = build_message(subject, body)
+    try:
+        for chunk in chunk_recipients(recipient_emails):
+            logger.info(f"Sending email to {len(chunk)} recipients...")
+            deliver_chunk(email_dispatcher.pool, chunk, message)
+        logger.info("✅ Email sent successfully!")
         return True
     except smtplib.SMTPAuthenticationError:
-        print("❌ Authentication failed. Check your credentials.")
+        logger.error("❌ Authentication failed. Check your credentials.")
         return False
     except Exception as e:
-        print(f"❌ Email sending failed: {e}")
+        logger.error(f"❌ Email sending failed: {e}")
         return False
-    finally:
-        if 'server' in locals() and server:
-            server.quit()
\ No newline at end of file
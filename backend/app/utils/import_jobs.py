@@ -0,0 +1,71 @@
+import datetime
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+from ..models.import_job_model import ImportJob
+from .student_import import StudentImport, RosterReadError, run_import
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Hashing already runs in the password pool, so import workers are threads
+_executor = ThreadPoolExecutor(max_workers=Config.IMPORT_WORKERS, thread_name_prefix="student-import")
+
+
+def enqueue_import(file, department, course, year, section, created_by):
+    """Spool an uploaded roster to disk and import it in the background; returns the job"""
+    os.makedirs(Config.IMPORT_SPOOL_DIR, exist_ok=True)
+    filename = secure_filename(file.filename) or 'roster'
+    path = os.path.join(Config.IMPORT_SPOOL_DIR, f"{uuid.uuid4().hex}-{filename}")
+    file.save(path)
+
+    job = ImportJob(
+        filename=file.filename, department=department, course=course, year=year,
+        section=section, created_by=str(created_by)
+    ).save()
+    _executor.submit(_run, job.id, path, file.filename)
+    return job
+
+
+def _progress(job_id):
+    def on_batch(student_import):
+        ImportJob.objects(id=job_id).update_one(
+            set__rows_processed=student_import.rows,
+            set__created=student_import.created,
+            set__errored=len(student_import.errors),
+            set__errors=student_import.errors[:Config.IMPORT_JOB_MAX_ERRORS]
+        )
+    return on_batch
+
+
+def _run(job_id, path, filename):
+    job = ImportJob.objects(id=job_id).first()
+    if not job:
+        os.remove(path)
+        return
+    ImportJob.objects(id=job_id).update_one(set__status='running', set__started_at=datetime.datetime.utcnow())
+    student_import = StudentImport(job.department, job.course, job.year, job.section)
+    on_batch = _progress(job_id)
+    try:
+        with open(path, 'rb') as roster:
+            summary = run_import(student_import, roster, filename, on_batch=on_batch)
+        on_batch(student_import)
+        ImportJob.objects(id=job_id).update_one(
+            set__status='completed', set__message=summary['message'],
+            set__finished_at=datetime.datetime.utcnow()
+        )
+    except Exception as e:
+        if isinstance(e, RosterReadError):
+            failure = f"Could not read the file: {e}"
+        else:
+            failure = str(e)
+            logger.error(f"Student import {job_id} failed: {e}", exc_info=True)
+        on_batch(student_import)
+        ImportJob.objects(id=job_id).update_one(
+            set__status='failed', set__failure=failure, set__message=student_import.summary()['message'],
+            set__finished_at=datetime.datetime.utcnow()
+        )
+    finally:
+        os.remove(path)
@@ -0,0 +1,219 @@
+import logging
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from ..models.inbox_model import InboxEntry
+from ..models.notice_model import Notice
+from ..models.notice_read_model import NoticeRead
+from ..models.student_model import Student
+from .audience import audience_student_filter, reader_audience_keys
+from .creator_cache import resolve_creators, creator_payload
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Syncs run in the background one at a time per process. Across processes
+# they are ordered by the notice's inbox generation (see sync_notice).
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inbox-sync")
+
+
+def _entry_fields(notice, creators):
+    return {
+        'created_at': notice.created_at,
+        'title': notice.title,
+        'content': notice.content,
+        'notice_type': notice.notice_type,
+        'priority': notice.priority,
+        'status': notice.status,
+        'attachments': notice.attachments or [],
+        'created_by': creator_payload(creators, notice.created_by),
+        'departments': notice.departments,
+        'program_course': notice.program_course,
+        'year': notice.year,
+        'section': notice.section
+    }
+
+
+def _claim_generation(notice_id):
+    """
+    Take the next inbox generation of a notice, reading the notice in the same
+    atomic update: a later generation always sees a notice at least as new.
+    Returns None if the notice is gone.
+    """
+    notice = Notice._get_collection().find_one_and_update(
+        {'_id': ObjectId(notice_id)},
+        {'$inc': {'inbox_generation': 1}},
+        projection={'reads': 0, 'recipient_emails': 0},
+        return_document=ReturnDocument.AFTER
+    )
+    return Notice._from_son(notice) if notice else None
+
+
+def _upsert_rows(notice_id, fields, student_ids):
+    """
+    Upsert one inbox row per student, then carry over reads notice_reads
+    already holds: a student may open a notice (e.g. from its email) before
+    their row exists, and mark_read only updates rows that do.
+    Rows already written by a newer generation are left alone.
+    """
+    inbox = InboxEntry._get_collection()
+    try:
+        inbox.bulk_write([
+            UpdateOne(
+                {'student_id': student_id, 'notice_id': notice_id,
+                 'generation': {'$not': {'$gt': fields['generation']}}},
+                {'$set': fields, '$setOnInsert': {'read': False}},
+                upsert=True
+            )
+            for student_id in student_ids
+        ], ordered=False)
+    except BulkWriteError as e:
+        # A newer row makes the filter miss and the upsert collide with it
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+
+    reads = NoticeRead._get_collection().find(
+        {'notice_id': notice_id, 'user_id': {'$in': [str(student_id) for student_id in student_ids]}},
+        {'user_id': 1, 'first_read_at': 1}
+    )
+    operations = _read_operations({(notice_id, read['user_id']): (read.get('first_read_at'),) for read in reads})
+    if operations:
+        inbox.bulk_write(operations, ordered=False)
+    return len(student_ids)
+
+
+def sync_notice(notice_id):
+    """
+    Bring every inbox row of a notice in line with it: upsert a row for each
+    student in its audience (keeping read state) and drop rows for students
+    who are no longer targeted.
+    """
+    notice = _claim_generation(notice_id)
+    if not notice:
+        remove_notice(notice_id)
+        return 0
+
+    generation = notice.inbox_generation
+    fields = _entry_fields(notice, resolve_creators([notice.created_by]))
+    fields['generation'] = generation
+
+    synced = 0
+    student_filter = audience_student_filter(notice)
+    if student_filter:
+        batch = []
+        for student in Student._get_collection().find(student_filter, {'_id': 1}):
+            batch.append(student['_id'])
+            if len(batch) >= Config.INBOX_FANOUT_CHUNK:
+                synced += _upsert_rows(notice.id, fields, batch)
+                batch = []
+        if batch:
+            synced += _upsert_rows(notice.id, fields, batch)
+
+    # Announce this generation before deleting: a slower, older sync that
+    # writes after the delete then sees it and cleans up after itself
+    finished = Notice._get_collection().find_one_and_update(
+        {'_id': notice.id},
+        {'$max': {'inbox_synced_generation': generation}},
+        projection={'inbox_synced_generation': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not finished:
+        # Deleted during the fan-out, possibly by another process
+        remove_notice(notice.id)
+        return 0
+    InboxEntry._get_collection().delete_many({
+        'notice_id': notice.id,
+        'generation': {'$not': {'$gte': finished['inbox_synced_generation']}}
+    })
+    return synced
+
+
+def sync_students(student_ids):
+    """Give newly created students rows for the existing notices they are in the audience of"""
+    readers = {}
+    for student in Student._get_collection().find({'_id': {'$in': list(student_ids)}},
+                                                   {'course': 1, 'branch': 1, 'year': 1, 'section': 1}):
+        reader = SimpleNamespace(id=student['_id'], **{
+            field: student.get(field) for field in ('course', 'branch', 'year', 'section')
+        })
+        readers[student['_id']] = set(reader_audience_keys(reader))
+    if not readers:
+        return 0
+
+    all_keys = set().union(*readers.values())
+    notice_ids = Notice._get_collection().distinct('_id', {'audience_keys': {'$in': list(all_keys)}})
+    # Each notice gets a generation of its own, so a full sync already running
+    # with an older view of the notice can't overwrite these rows
+    notices = [notice for notice in map(_claim_generation, notice_ids) if notice]
+    creators = resolve_creators(notice.created_by for notice in notices)
+    synced = 0
+    for notice in notices:
+        keys = set(notice.audience_keys)
+        targeted = [student_id for student_id, reader_keys in readers.items() if reader_keys & keys]
+        fields = _entry_fields(notice, creators)
+        fields['generation'] = notice.inbox_generation
+        for start in range(0, len(targeted), Config.INBOX_FANOUT_CHUNK):
+            synced += _upsert_rows(notice.id, fields, targeted[start:start + Config.INBOX_FANOUT_CHUNK])
+    return synced
+
+
+def remove_notice(notice_id):
+    InboxEntry._get_collection().delete_many({'notice_id': ObjectId(notice_id)})
+
+
+def _read_operations(reads):
+    return [
+        UpdateOne(
+            {'student_id': ObjectId(user_id), 'notice_id': ObjectId(notice_id)},
+            {'$set': {'read': True}, '$min': {'read_at': entry[0]}}
+        )
+        for (notice_id, user_id), entry in reads.items() if ObjectId.is_valid(str(user_id))
+    ]
+
+
+def mark_read(reads):
+    """
+    Flag inbox rows as read for {(notice_id, user_id): (first_read_at, ...)} entries.
+    Rows that do not exist yet pick the read up from notice_reads when they are synced.
+    """
+    if not Config.INBOX_ENABLED:
+        return
+    operations = _read_operations(reads)
+    if operations:
+        InboxEntry._get_collection().bulk_write(operations, ordered=False)
+
+
+def _run_sync(notice_id):
+    try:
+        sync_notice(notice_id)
+    except Exception as e:
+        logger.error(f"Inbox sync failed for notice {notice_id}: {e}", exc_info=True)
+
+
+def schedule_sync(notice_id):
+    """
+    Rebuild a notice's inbox rows off the request thread. Call it after every
+    change to a notice, including direct updates such as its approval status.
+    """
+    if Config.INBOX_ENABLED:
+        _executor.submit(_run_sync, notice_id)
+
+
+def _run_student_sync(student_ids):
+    try:
+        sync_students(student_ids)
+    except Exception as e:
+        logger.error(f"Inbox sync failed for {len(student_ids)} new students: {e}", exc_info=True)
+
+
+def schedule_student_sync(student_ids):
+    """Backfill new students' inboxes on the sync worker, after any notice syncs already queued"""
+    if Config.INBOX_ENABLED and student_ids:
+        _executor.submit(_run_student_sync, list(student_ids))
+
+
+def schedule_removal(notice_id):
+    if Config.INBOX_ENABLED:
+        _executor.submit(remove_notice, notice_id)
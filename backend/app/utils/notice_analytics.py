@@ -0,0 +1,115 @@
+import datetime
+from ..models.notice_model import Notice
+from ..models.notice_read_model import NoticeRead
+
+
+class InvalidDateRange(ValueError):
+    pass
+
+
+def parse_date_range(start, end):
+    """
+    Parse the ?from=&to= query parameters (ISO dates or datetimes, UTC).
+    A bare `to` date includes that whole day. Either bound may be omitted.
+    """
+    bounds = []
+    for name, value in (('from', start), ('to', end)):
+        if value in (None, ''):
+            bounds.append(None)
+            continue
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise InvalidDateRange(f"{name} must be an ISO date, e.g. 2024-01-31")
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        if name == 'to' and len(value) == 10:
+            parsed += datetime.timedelta(days=1)
+        bounds.append(parsed)
+    if bounds[0] and bounds[1] and bounds[0] >= bounds[1]:
+        raise InvalidDateRange("from must be before to")
+    return bounds
+
+
+def _range(field, start, end):
+    match = {}
+    if start:
+        match['$gte'] = start
+    if end:
+        match['$lt'] = end
+    return {field: match} if match else {}
+
+
+def _reads_by(field):
+    """$facet branch: reads grouped by a field of the notice that was read"""
+    stages = [
+        {'$match': {'kind': 'read'}},
+        # One lookup per notice read rather than per read
+        {'$group': {'_id': '$notice_id', 'reads': {'$sum': 1}}},
+        {'$lookup': {'from': Notice._get_collection_name(), 'localField': '_id',
+                     'foreignField': '_id', 'as': 'notice'}},
+        {'$unwind': '$notice'}
+    ]
+    if field == 'departments':
+        # A notice sent to several departments counts towards each of them
+        stages.append({'$unwind': '$notice.departments'})
+    stages += [
+        {'$group': {'_id': f"$notice.{field}", 'reads': {'$sum': '$reads'}}},
+        {'$sort': {'reads': -1, '_id': 1}}
+    ]
+    return stages
+
+
+def notice_analytics(start=None, end=None):
+    """
+    Dashboard stats for notices created and reads made in [start, end).
+
+    Runs as a single aggregation: notices in range are unioned with reads in
+    range and every statistic is one $facet branch, so the server does the
+    counting and nothing is hydrated here. A read is a (notice, reader) row of
+    notice_reads dated by its first read; `totalViews` also counts repeat reads.
+    """
+    pipeline = [
+        {'$match': _range('created_at', start, end)},
+        {'$project': {'_id': 0, 'kind': 'notice'}},
+        {'$unionWith': {'coll': NoticeRead._get_collection_name(), 'pipeline': [
+            {'$match': _range('first_read_at', start, end)},
+            {'$project': {'_id': 0, 'kind': 'read', 'notice_id': 1, 'user_id': 1,
+                          'read_count': 1, 'first_read_at': 1}}
+        ]}},
+        {'$facet': {
+            'notices': [{'$match': {'kind': 'notice'}}, {'$count': 'count'}],
+            'reads': [
+                {'$match': {'kind': 'read'}},
+                {'$group': {'_id': None, 'reads': {'$sum': 1}, 'views': {'$sum': '$read_count'}}}
+            ],
+            'readers': [{'$match': {'kind': 'read'}}, {'$group': {'_id': '$user_id'}}, {'$count': 'count'}],
+            'perDay': [
+                {'$match': {'kind': 'read'}},
+                {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$first_read_at'}},
+                            'reads': {'$sum': 1}}},
+                {'$sort': {'_id': 1}}
+            ],
+            'byDepartment': _reads_by('departments'),
+            'byPriority': _reads_by('priority'),
+            'byNoticeType': _reads_by('notice_type')
+        }}
+    ]
+    result = next(Notice._get_collection().aggregate(pipeline, allowDiskUse=True))
+
+    def buckets(name, key):
+        return [{key: row['_id'], "reads": row['reads']} for row in result[name]]
+
+    totals = result['reads'][0] if result['reads'] else {'reads': 0, 'views': 0}
+    return {
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "totalNotices": result['notices'][0]['count'] if result['notices'] else 0,
+        "totalReads": totals['reads'],
+        "totalViews": totals['views'],
+        "uniqueReaders": result['readers'][0]['count'] if result['readers'] else 0,
+        "readsPerDay": buckets('perDay', 'date'),
+        "byDepartment": buckets('byDepartment', 'department'),
+        "byPriority": buckets('byPriority', 'priority'),
+        "byNoticeType": buckets('byNoticeType', 'noticeType')
+    }
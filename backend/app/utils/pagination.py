@@ -0,0 +1,86 @@
+import base64
+import datetime
+import json
+from bson import ObjectId
+from flask import Response, stream_with_context
+from mongoengine.queryset.visitor import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse the ?limit= query parameter, clamped to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(created_at, doc_id):
+    payload = json.dumps([created_at.isoformat(), str(doc_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Turn an opaque cursor back into its (created_at, ObjectId) position"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.datetime.fromisoformat(created_at), ObjectId(doc_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE, field='created_at'):
+    """
+    Fetch one page of `queryset` ordered by (-field, -_id), starting after `cursor`.
+    Returns the documents on the page and the cursor for the next one (or None).
+    """
+    if cursor:
+        position, last_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{field}__lt": position}) | Q(**{field: position, "id__lt": last_id})
+        )
+
+    docs = list(queryset.order_by(f'-{field}', '-id').limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.id)
+    return docs, next_cursor
+
+
+def stream_json_array(items, serialize):
+    """Yield a JSON array one element at a time instead of building it in memory"""
+    yield '['
+    for index, item in enumerate(items):
+        if index:
+            yield ','
+        yield json.dumps(serialize(item))
+    yield ']'
+
+
+def paginated_response(docs, serialize, next_cursor):
+    """
+    Stream a page as a plain JSON array (the shape existing clients expect);
+    the cursor for the following page travels in the X-Next-Cursor header.
+    """
+    headers = {}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+        headers['Access-Control-Expose-Headers'] = 'X-Next-Cursor'
+    return Response(
+        stream_with_context(stream_json_array(docs, serialize)),
+        status=200,
+        mimetype='application/json',
+        headers=headers
+    )
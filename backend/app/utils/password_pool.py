@@ -0,0 +1,151 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when no hashing slot frees up within the configured wait"""
+
+
+def _hash_many(passwords):
+    return [generate_password_hash(password) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug password hashing and verification in a process pool so a
+    login storm or a roster import uses every core without pinning request
+    threads. At most `max_pending` tasks are queued or running at once; callers
+    wait up to `wait_seconds` for a slot before PasswordPoolBusy is raised.
+    With `workers=0` everything runs inline on the calling thread.
+
+    Each server worker process has a pool of its own, so `workers` should be
+    about cores / server workers; Config.PASSWORD_POOL_WORKERS defaults to that.
+    """
+
+    def __init__(self, workers, max_pending, wait_seconds):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.task_seconds = 0.0
+
+    def _get_executor(self):
+        # Pools don't survive a fork; each worker process starts its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn: forking a threaded server process is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy("Password hashing is saturated; try again shortly")
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            if not self.workers:
+                return fn(*args)
+            try:
+                return self._get_executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                logger.error("Password hashing pool broke; it will be restarted on next use")
+                with self._lock:
+                    self._executor = None
+                raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.task_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    def hash_password(self, password):
+        return self._run(generate_password_hash, password)
+
+    def verify_password(self, pwhash, password):
+        if not pwhash or password is None:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def hash_passwords(self, passwords):
+        """Hash many passwords, split evenly across the pool's workers"""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        if not self.workers:
+            return self._run(_hash_many, passwords)
+        size = -(-len(passwords) // self.workers)
+        batches = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        results = [None] * len(batches)
+        errors = []
+
+        def hash_batch(index):
+            try:
+                results[index] = self._run(_hash_many, batches[index])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=hash_batch, args=(index,)) for index in range(1, len(batches))]
+        for thread in threads:
+            thread.start()
+        hash_batch(0)
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return [pwhash for result in results for pwhash in result]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "maxPending": self.max_pending,
+                "inFlight": self.in_flight,
+                "queueDepth": max(0, self.in_flight - self.workers) if self.workers else 0,
+                "peakInFlight": self.peak_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avgTaskMs": round(self.task_seconds / self.completed * 1000, 2) if self.completed else None
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_POOL_WORKERS,
+    max_pending=Config.PASSWORD_POOL_MAX_PENDING,
+    wait_seconds=Config.PASSWORD_POOL_WAIT_SECONDS
+)
+
+
+def hash_password(password):
+    return password_hasher.hash_password(password)
+
+
+def verify_password(pwhash, password):
+    return password_hasher.verify_password(pwhash, password)
+
+
+def hash_passwords(passwords):
+    return password_hasher.hash_passwords(passwords)
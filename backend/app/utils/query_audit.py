@@ -0,0 +1,175 @@
+"""
+Index reconciliation and query-plan audit, driven from manage.py.
+
+The audited queries are the shapes the controllers and background workers run
+on every request or job, built from representative documents found in the
+database. Each is explained, and the audit fails if a winning plan scans a
+whole collection.
+"""
+import datetime
+import random
+from bson import ObjectId
+from mongoengine.queryset.visitor import Q
+from ..models.approval_model import Approval
+from ..models.email_delivery_model import EmailDelivery
+from ..models.employee_model import Employee
+from ..models.import_job_model import ImportJob
+from ..models.inbox_model import InboxEntry
+from ..models.notice_model import Notice
+from ..models.notice_read_model import NoticeRead
+from ..models.student_model import Student
+from ..models.user_model import User
+from .audience import reader_audience_keys, audience_student_filter
+
+# Models whose declared indexes are reconciled, one per collection
+INDEXED_MODELS = (Notice, NoticeRead, InboxEntry, EmailDelivery, ImportJob, Student, User, Employee, Approval)
+
+
+def reconcile_indexes(drop_extra=False):
+    """Create every declared index; report (or drop) indexes no model declares"""
+    report = []
+    for model in INDEXED_MODELS:
+        model.ensure_indexes()
+        extra = model.compare_indexes()['extra']
+        if drop_extra:
+            collection = model._get_collection()
+            by_key = {tuple(info['key']): name for name, info in collection.index_information().items()}
+            for key in extra:
+                collection.drop_index(by_key[tuple(key)])
+        report.append((model._get_collection_name(), extra))
+    return report
+
+
+def _find(model, query, sort=None):
+    cursor = model._get_collection().find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor.limit(50).explain()
+
+
+def _hot_queries(sample):
+    student = sample['student']
+    notice = sample['notice']
+    keys = reader_audience_keys(student)
+    last = Notice.objects(id=notice.id).only('created_at').first()
+    return [
+        ("notice feed, first page",
+         lambda: Notice.objects().order_by('-created_at', '-id').limit(51).explain()),
+        ("notice feed, after cursor",
+         lambda: Notice.objects(Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, id__lt=last.id))
+         .order_by('-created_at', '-id').limit(51).explain()),
+        ("student feed by audience",
+         lambda: Notice.objects(audience_keys__in=keys).order_by('-created_at').explain()),
+        ("student inbox",
+         lambda: InboxEntry.objects(student_id=student.id).order_by('-created_at', '-id').limit(51).explain()),
+        ("notices by creator",
+         lambda: Notice.objects(created_by=notice.created_by).order_by('-created_at').explain()),
+        ("notice by id",
+         lambda: Notice.objects(id=notice.id).explain()),
+        ("notice targeting by cohort",
+         lambda: Student.objects(course=student.course, branch=student.branch,
+                                 year=student.year, section=student.section).explain()),
+        ("notice targeting by course and branch",
+         lambda: Student.objects(course=student.course, branch=student.branch).explain()),
+        ("inbox fan-out audience",
+         lambda: _find(Student, audience_student_filter(notice) or {'_id': student.id})),
+        ("inbox rows of a stale generation",
+         lambda: _find(InboxEntry, {'notice_id': notice.id, 'generation': {'$lt': 1}})),
+        ("readers of a notice",
+         lambda: NoticeRead.objects(notice_id=notice.id).order_by('-last_read_at').explain()),
+        ("email delivery ledger",
+         lambda: EmailDelivery.objects(notice_id=notice.id).order_by('-queued_at', 'chunk_index').explain()),
+        ("user login",
+         lambda: User.objects(email=sample['user'].email).explain()),
+        ("student login",
+         lambda: Student.objects(univ_roll_no=student.univ_roll_no).explain()),
+        ("employee login",
+         lambda: Employee.objects(employee_id=sample['employee'].employee_id).explain()),
+        ("roster duplicate check",
+         lambda: _find(Student, {'univ_roll_no': {'$in': [student.univ_roll_no, 'NOT-A-ROLL']}})),
+        ("my approvals",
+         lambda: _find(Approval, {'approver_id': sample['employee'].id}, [('created_at', -1)])),
+        ("pending approvals of a notice",
+         lambda: _find(Approval, {'notice_id': notice.id, 'status': 'pending'})),
+        ("notice by approval",
+         lambda: _find(Notice, {'approval_workflow': ObjectId()})),
+    ]
+
+
+def _stages(plan):
+    """Every stage name in an explain() plan tree"""
+    stages = set()
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.add(plan['stage'])
+        for value in plan.values():
+            stages |= _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= _stages(value)
+    return stages
+
+
+def audit_queries():
+    """Explain every hot query; returns [(name, stages of the winning plan)]"""
+    sample = {
+        'student': Student.objects(course__ne=None).order_by('-id').first(),
+        'notice': Notice.objects(program_course__ne=None).order_by('-id').first(),
+        'user': User.objects().first(),
+        'employee': Employee.objects().first()
+    }
+    missing = [name for name, document in sample.items() if document is None]
+    if missing:
+        raise RuntimeError(f"No sample {', '.join(missing)} to build queries from; seed the database first")
+
+    results = []
+    for name, explain in _hot_queries(sample):
+        planner = explain().get('queryPlanner', {})
+        results.append((name, _stages(planner.get('winningPlan', planner))))
+    return results
+
+
+def seed(students=2000, notices=500):
+    """Fill an empty database with enough data for the planner to choose between plans"""
+    now = datetime.datetime.utcnow()
+    rng = random.Random(19)
+    cohorts = [(course, branch, year, section)
+               for course in ('BTech', 'MTech') for branch in ('CSE', 'ECE', 'ME')
+               for year in ('1', '2', '3', '4') for section in ('A', 'B')]
+
+    user = User(name='Audit Author', email='audit-author@example.invalid', password='-', role='academic').save()
+    employee = Employee(employee_id='AUDIT-1', name='Audit Approver', department='CSE', post='HOD',
+                        official_email='audit-approver@example.invalid', email='audit-hod@example.invalid',
+                        role='academic', password='-').save()
+
+    student_docs = []
+    for index in range(students):
+        course, branch, year, section = rng.choice(cohorts)
+        student_docs.append({
+            'univ_roll_no': f"AUDIT-{index}", 'course': course, 'branch': branch, 'year': year,
+            'section': section, 'name': f"Audit Student {index}", 'password': '-',
+            'email': f"audit{index}@example.invalid", 'official_email': f"audit{index}@example.invalid"
+        })
+    student_ids = Student._get_collection().insert_many(student_docs).inserted_ids
+
+    for index in range(notices):
+        course, branch, year, section = rng.choice(cohorts)
+        notice = Notice(
+            title=f"Audit notice {index}", content='-', program_course=course, departments=[branch],
+            year=year, section=section, status='published', created_by=str(user.id),
+            audience_students=rng.sample(student_ids, 3),
+            created_at=now - datetime.timedelta(minutes=index)
+        ).save()
+        Approval(notice_id=notice, approver_id=employee, status=rng.choice(['pending', 'approved'])).save()
+
+    notice_ids = [doc['_id'] for doc in Notice._get_collection().find({}, {'_id': 1})]
+    NoticeRead._get_collection().insert_many([
+        {'notice_id': rng.choice(notice_ids), 'user_id': str(student_id), 'first_read_at': now,
+         'last_read_at': now, 'read_count': 1}
+        for student_id in student_ids
+    ])
+    InboxEntry._get_collection().insert_many([
+        {'student_id': student_id, 'notice_id': rng.choice(notice_ids), 'created_at': now, 'read': False,
+         'generation': 0}
+        for student_id in student_ids
+    ])
@@ -0,0 +1,270 @@
+import atexit
+import datetime
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from bson import ObjectId
+from pymongo import UpdateOne
+from ..models.notice_model import Notice
+from ..models.notice_read_model import NoticeRead
+from .inbox import mark_read as mark_inbox_read
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _combine(entry, other):
+    return min(entry[0], other[0]), max(entry[1], other[1]), entry[2] + other[2]
+
+
+class ReadReceiptBuffer:
+    """
+    Write-behind buffer for notice read receipts.
+
+    Reads are coalesced in memory per (notice, user) and flushed to notice_reads
+    with one bulk upsert when `max_pending` keys accumulate or every
+    `flush_interval` seconds. Every accepted event is first appended to a
+    per-process spill file; `start` (called at app start-up) replays the spill
+    files left behind by dead workers, so buffered reads survive a restart.
+
+    Each flush is a batch with its own id, which NoticeRead rows remember once
+    applied. A batch that is replayed after a crash mid-flush, or retried after
+    a failed write, therefore never increments a read count twice.
+    """
+
+    def __init__(self, spill_dir, max_pending=500, flush_interval=2.0, fsync=False):
+        self.spill_dir = spill_dir
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self):
+        """Recover orphaned spill files and start the flusher in this process"""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        # Re-initialise after a fork: threads, locks and file handles don't carry over
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._lock = threading.Lock()
+            self._flush_lock = threading.Lock()
+            self._wake = threading.Event()
+            self._pending = {}
+            self._retries = {}  # batch id -> entries of a batch that still has to be written
+            self._recount = set()
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._spill_path = os.path.join(self.spill_dir, f"reads-{os.getpid()}.jsonl")
+            recovered, claimed = self._claim_orphans()
+            self._spill = open(self._spill_path, 'a', encoding='utf-8')
+            for batch_id, entries in recovered.items():
+                self._retries[batch_id] = entries
+                self._append_spill(entries, batch_id)
+            # Only now that the reads are in our own spill can the claimed files go
+            for path in claimed:
+                os.remove(path)
+            if recovered:
+                count = sum(len(entries) for entries in recovered.values())
+                logger.info(f"Recovered {count} buffered reads from spill files")
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="read-receipt-flusher", daemon=True).start()
+            atexit.register(self.flush)
+
+    def _claim_orphans(self):
+        """
+        Take over spill files whose owning process is gone. Returns the reads
+        they hold as {batch id: {key: entry}} and the claimed paths.
+
+        Untagged lines of a `<spill>.<batch id>.flushing` file are the batch
+        that was being written; those of a plain spill were never flushed and
+        get a fresh id. Tagged lines are retries of the batch they name.
+        """
+        recovered, claimed_paths = {}, []
+        for path in glob.glob(os.path.join(self.spill_dir, "reads-*")):
+            name = os.path.basename(path)
+            try:
+                pid = int(name.split('-')[1].split('.')[0])
+            except (IndexError, ValueError):
+                continue
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            parts = name.split('.')
+            file_batch = parts[-2] if name.endswith('.flushing') and len(parts) == 4 else uuid.uuid4().hex
+            claimed = os.path.join(self.spill_dir, f"replay-{os.getpid()}-{uuid.uuid4().hex}.jsonl")
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            claimed_paths.append(claimed)
+
+            untagged = {}
+            with open(claimed, encoding='utf-8') as spill:
+                for line in spill:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    key = (event['n'], event['u'])
+                    entry = (datetime.datetime.fromisoformat(event['f']),
+                             datetime.datetime.fromisoformat(event['l']), event['c'])
+                    if 'b' in event:
+                        # The same retry can sit in more than one file; it is one write
+                        recovered.setdefault(event['b'], {})[key] = entry
+                    else:
+                        previous = untagged.get(key)
+                        untagged[key] = _combine(previous, entry) if previous else entry
+            if untagged:
+                recovered.setdefault(file_batch, {}).update(untagged)
+        return recovered, claimed_paths
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Read receipt flush failed: {e}", exc_info=True)
+
+    # -- buffering -----------------------------------------------------------
+
+    def _merge(self, key, first, last, count):
+        entry = self._pending.get(key)
+        self._pending[key] = _combine(entry, (first, last, count)) if entry else (first, last, count)
+
+    def _append_spill(self, events, batch_id=None):
+        for (notice_id, user_id), (first, last, count) in events.items():
+            event = {'n': notice_id, 'u': user_id, 'f': first.isoformat(), 'l': last.isoformat(), 'c': count}
+            if batch_id:
+                event['b'] = batch_id
+            self._spill.write(json.dumps(event) + '\n')
+        self._spill.flush()
+        if self.fsync:
+            os.fsync(self._spill.fileno())
+
+    def add(self, notice_id, user_id, timestamp=None):
+        """Buffer a read; returns False if this process already holds one for the same key"""
+        self._ensure_started()
+        now = timestamp or datetime.datetime.utcnow()
+        key = (str(notice_id), str(user_id))
+        with self._lock:
+            first = key not in self._pending and not any(key in entries for entries in self._retries.values())
+            self._append_spill({key: (now, now, 1)})
+            self._merge(key, now, now, 1)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+        return first
+
+    def pending(self):
+        if self._pid != os.getpid():
+            return 0
+        with self._lock:
+            return len(self._pending) + sum(len(entries) for entries in self._retries.values())
+
+    # -- flushing ------------------------------------------------------------
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of keys written"""
+        if self._pid != os.getpid():
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending and not self._retries and not self._recount:
+                    return 0
+                batch_id = uuid.uuid4().hex
+                batches, self._retries = self._retries, {}
+                if self._pending:
+                    batches[batch_id] = self._pending
+                self._pending = {}
+                recount, self._recount = self._recount, set()
+                # Start a fresh spill; the old one, named after the batch, is
+                # dropped once the batch is stored
+                self._spill.close()
+                flushing_path = f"{self._spill_path}.{batch_id}.flushing"
+                os.replace(self._spill_path, flushing_path)
+                self._spill = open(self._spill_path, 'a', encoding='utf-8')
+
+            retry = batches
+            try:
+                retry = self._write(batches, recount)
+            except Exception:
+                with self._lock:
+                    self._recount |= recount
+                raise
+            finally:
+                # Anything not stored is retried under its batch id, which the new spill records
+                with self._lock:
+                    for retry_id, entries in retry.items():
+                        self._retries.setdefault(retry_id, {}).update(entries)
+                        self._append_spill(entries, retry_id)
+                os.remove(flushing_path)
+
+            return sum(map(len, batches.values())) - sum(map(len, retry.values()))
+
+    def _write(self, batches, recount):
+        """Store {batch id: {key: entry}}; returns the entries that failed, by batch id"""
+        failed = {}
+        if batches:
+            # Drop reads of notices that no longer exist (or never did)
+            notice_ids = {
+                ObjectId(notice_id) for entries in batches.values()
+                for notice_id, _ in entries if ObjectId.is_valid(notice_id)
+            }
+            existing = {
+                str(doc['_id']) for doc in
+                Notice._get_collection().find({'_id': {'$in': list(notice_ids)}}, {'_id': 1})
+            }
+            for batch_id, entries in batches.items():
+                reads = {
+                    (ObjectId(notice_id), user_id): entry
+                    for (notice_id, user_id), entry in entries.items() if notice_id in existing
+                }
+                new_reader_notices, batch_failed = NoticeRead.record_many(reads, batch_id)
+                mark_inbox_read(reads)
+                recount |= new_reader_notices
+                if batch_failed:
+                    failed[batch_id] = {
+                        (str(notice_id), user_id): reads[(notice_id, user_id)] for notice_id, user_id in batch_failed
+                    }
+
+        if recount:
+            # read_count is recomputed rather than incremented, so a retried batch can't skew it
+            try:
+                counts = NoticeRead.reader_counts(recount)
+                Notice._get_collection().bulk_write([
+                    UpdateOne({'_id': notice_id}, {'$set': {'read_count': readers}})
+                    for notice_id, readers in counts.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to refresh notice read counts: {e}")
+                with self._lock:
+                    self._recount |= recount
+        return failed
+
+
+read_buffer = ReadReceiptBuffer(
+    spill_dir=Config.READ_BUFFER_SPILL_DIR,
+    max_pending=Config.READ_BUFFER_MAX_PENDING,
+    flush_interval=Config.READ_BUFFER_FLUSH_SECONDS,
+    fsync=Config.READ_BUFFER_FSYNC
+)
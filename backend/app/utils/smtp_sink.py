@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+
+class SinkStats:
+    """Counters shared by every sink connection in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections = 0
+            self.messages = 0
+            self.recipients = 0
+            self.failures = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "messages": self.messages,
+                "recipients": self.recipients,
+                "failures": self.failures
+            }
+
+
+sink_stats = SinkStats()
+
+
+class SinkSMTP:
+    """
+    In-process stand-in for smtplib.SMTP that accepts and discards mail.
+
+    Implements the part of the smtplib interface the dispatcher uses. Each
+    message waits `latency_ms` (plus `per_recipient_ms` per envelope recipient)
+    before the DATA reply, and a `failure_rate` share of messages is answered
+    with a transient 451 so the retry path is exercised too.
+    """
+
+    def __init__(self, latency_ms=0.0, per_recipient_ms=0.0, failure_rate=0.0):
+        self.latency_ms = latency_ms
+        self.per_recipient_ms = per_recipient_ms
+        self.failure_rate = failure_rate
+        self._envelope = []
+        sink_stats.add(connections=1)
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def noop(self):
+        return 250, b"OK"
+
+    def mail(self, sender):
+        self._envelope = []
+        return 250, b"2.1.0 OK"
+
+    def rcpt(self, recipient):
+        self._envelope.append(recipient)
+        return 250, b"2.1.5 OK"
+
+    def rset(self):
+        self._envelope = []
+        return 250, b"OK"
+
+    def data(self, message):
+        recipients, self._envelope = len(self._envelope), []
+        delay = self.latency_ms + self.per_recipient_ms * recipients
+        if delay:
+            time.sleep(delay / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            sink_stats.add(failures=1)
+            return 451, b"4.3.0 Injected sink failure"
+        sink_stats.add(messages=1, recipients=recipients)
+        return 250, b"2.0.0 OK: queued by sink"
+
+    def quit(self):
+        return 221, b"Bye"
@@ -0,0 +1,238 @@
+import datetime
+import random
+import string
+from pymongo.errors import BulkWriteError
+from ..models.student_model import Student
+from .password_pool import hash_passwords
+from .inbox import schedule_student_sync
+from config import Config
+
+# pandas and openpyxl are imported inside the functions that use them: they
+# cost more at startup than the rest of the app, and only imports need them
+
+COLUMN_MAP = {
+    'name': ['name', 'student name', 'student_name'],
+    'univ_roll_no': ['univ_roll_no', 'univ rollno', 'univ. rollno.', 'roll no', 'roll_no'],
+    'class_roll_no': ['class_roll_no', 'class roll no'],
+    'email': ['email', 'email id', 'official_email', 'official email-id'],
+    'father_name': ['fathers name', 'father_name', 'father name'],
+    'student_mobile': ['stu. mob.', 'student_mobile', 'mobile no', 'student contact'],
+    'father_mobile': ['father mob.', 'father_mobile', 'father contact']
+}
+
+# Roster columns copied onto the student as they are
+PROFILE_FIELDS = ('name', 'class_roll_no', 'father_name', 'student_mobile', 'father_mobile')
+
+
+def generate_password(length=6):
+    chars = string.ascii_letters + string.digits
+    return ''.join(random.choice(chars) for _ in range(length))
+
+
+class RosterReadError(Exception):
+    """The uploaded roster could not be parsed"""
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    # Excel stores every number as a float; roll and phone numbers are integers
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _xlsx_frames(file, chunk_rows):
+    import openpyxl
+    import pandas as pd
+
+    # Read-only mode streams rows from the sheet XML instead of loading every cell
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise RosterReadError("The sheet is empty")
+        columns = [_cell_text(column) for column in header]
+        width = len(columns)
+        batch = []
+        blank = 0
+        for row in rows:
+            # Sheets often carry formatted but empty rows at the end; only keep
+            # blank rows that sit between data rows, so row numbers stay right
+            if all(cell is None for cell in row):
+                blank += 1
+                continue
+            batch.extend([''] * width for _ in range(blank))
+            blank = 0
+            cells = [_cell_text(cell) for cell in row[:width]]
+            batch.append(cells + [''] * (width - len(cells)))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def read_roster(file, filename, chunk_rows=None):
+    """
+    Stream an uploaded CSV or Excel roster as DataFrames of at most `chunk_rows`
+    rows, each paired with the spreadsheet row number of its first row. Cells
+    are read as text. Raises RosterReadError if the file cannot be parsed.
+    """
+    import pandas as pd
+
+    chunk_rows = chunk_rows or Config.IMPORT_BATCH_SIZE
+    name = filename.lower()
+    try:
+        if name.endswith('.csv'):
+            frames = pd.read_csv(file, encoding='utf-8', skipinitialspace=True, dtype=str, chunksize=chunk_rows)
+        elif name.endswith(('.xlsx', '.xlsm')):
+            frames = _xlsx_frames(file, chunk_rows)
+        else:
+            # Legacy .xls has no streaming reader; it is loaded whole and sliced
+            df = pd.read_excel(file, dtype=str)
+            frames = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+
+        first_row = 2
+        for frame in frames:
+            yield frame, first_row
+            first_row += len(frame)
+    except RosterReadError:
+        raise
+    except Exception as e:
+        raise RosterReadError(str(e)) from e
+
+
+def normalise_roster(df):
+    """One string column per COLUMN_MAP field, taken from the first alias present"""
+    import pandas as pd
+
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    df = df.loc[:, ~df.columns.duplicated()]
+    roster = pd.DataFrame(index=df.index)
+    for field, aliases in COLUMN_MAP.items():
+        column = next((alias for alias in aliases if alias in df.columns), None)
+        roster[field] = df[column].fillna('').astype(str).str.strip() if column else ''
+    return roster
+
+
+class StudentImport:
+    """
+    Imports roster rows for one course/department/year/section.
+
+    Each DataFrame passed to `add_frame` is validated and deduplicated as a
+    whole (one `univ_roll_no__in` query against existing students), its
+    generated passwords are hashed in parallel, and the new students are
+    written with unordered bulk inserts of `batch_size`. Row numbers in errors
+    are spreadsheet rows (the header is row 1).
+    """
+
+    def __init__(self, department, course, year, section, batch_size=None):
+        self.defaults = {'branch': department, 'course': course, 'year': year, 'section': section}
+        self.batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self._first_rows = {}  # roll number -> first row it appeared on
+
+    def add_frame(self, df, first_row=2):
+        import pandas as pd
+
+        roster = normalise_roster(df)
+        rows = pd.RangeIndex(first_row, first_row + len(roster))
+        roster.index = rows
+        self.rows += len(roster)
+        errors = {}
+
+        missing = roster['univ_roll_no'] == ''
+        for row in roster.index[missing]:
+            errors[row] = f"Row {row}: Missing University Roll Number"
+
+        rolls = roster.loc[~missing, 'univ_roll_no']
+        repeated = rolls.duplicated(keep='first') | rolls.isin(list(self._first_rows))
+        first_in_frame = pd.Series(rolls.index, index=rolls.values)
+        first_in_frame = first_in_frame[~first_in_frame.index.duplicated()]
+        for row, roll in rolls[repeated].items():
+            first = self._first_rows.get(roll, first_in_frame.get(roll))
+            errors[row] = f"Row {row}: Duplicate University Roll Number {roll} (first on row {first})"
+        candidates = roster.loc[rolls.index[~repeated]]
+        self._first_rows.update(zip(candidates['univ_roll_no'], candidates.index))
+
+        existing = set(Student.objects(univ_roll_no__in=candidates['univ_roll_no'].tolist()).distinct('univ_roll_no')) \
+            if len(candidates) else set()
+        exists = candidates['univ_roll_no'].isin(existing)
+        for row, roll in candidates.loc[exists, 'univ_roll_no'].items():
+            errors[row] = f"Row {row}: Student {roll} already exists"
+
+        new = candidates[~exists]
+        if len(new):
+            for row, message in self._insert(new).items():
+                errors[row] = message
+
+        self.errors.extend(errors[row] for row in sorted(errors))
+
+    def _insert(self, new):
+        raw_passwords = [generate_password() for _ in range(len(new))]
+        hashed = hash_passwords(raw_passwords)
+        login_emails = new['email'].where(new['email'] != '', new['univ_roll_no'] + '@university.edu').str.lower()
+        created_at = datetime.datetime.utcnow()
+
+        docs = new[['univ_roll_no', *PROFILE_FIELDS]].to_dict('records')
+        for doc, official_email, login_email, raw_password, pwhash in zip(
+                docs, new['email'], login_emails, raw_passwords, hashed):
+            doc.update(self.defaults)
+            doc.update(official_email=official_email, email=login_email, password=pwhash,
+                       raw_password=raw_password, created_at=created_at)
+
+        errors = {}
+        students = Student._get_collection()
+        rows = list(new.index)
+        for start in range(0, len(docs), self.batch_size):
+            chunk = docs[start:start + self.batch_size]
+            try:
+                result = students.insert_many(chunk, ordered=False)
+                self.created += len(result.inserted_ids)
+                schedule_student_sync(result.inserted_ids)
+            except BulkWriteError as e:
+                self.created += e.details.get('nInserted', 0)
+                failed = {failure['index'] for failure in e.details.get('writeErrors', [])}
+                # insert_many sets _id on every document it was given
+                schedule_student_sync([doc['_id'] for index, doc in enumerate(chunk) if index not in failed])
+                for failure in e.details.get('writeErrors', []):
+                    row = rows[start + failure['index']]
+                    roll = chunk[failure['index']]['univ_roll_no']
+                    if failure.get('code') == 11000:
+                        field = next(iter(failure.get('keyPattern') or {}), 'key')
+                        errors[row] = f"Row {row}: Student {roll} could not be saved (duplicate {field})"
+                    else:
+                        errors[row] = f"Row {row}: Student {roll} could not be saved ({failure.get('errmsg')})"
+        return errors
+
+    def summary(self):
+        message = f"Created {self.created} new students." if self.created else "No new students added."
+        if self.errors:
+            message += f" {len(self.errors)} rows had issues."
+        return {"message": message, "created": self.created, "errors": self.errors}
+
+
+def run_import(student_import, file, filename, on_batch=None):
+    """
+    Stream a roster file through `student_import` and return its summary.
+    `on_batch(student_import)` runs after every batch. Raises RosterReadError
+    only if not a single row could be read.
+    """
+    try:
+        for frame, first_row in read_roster(file, filename):
+            student_import.add_frame(frame, first_row)
+            if on_batch:
+                on_batch(student_import)
+    except RosterReadError as e:
+        if not student_import.rows:
+            raise
+        student_import.errors.append(
+            f"Stopped after row {student_import.rows + 1}: could not read the rest of the file ({e})"
+        )
+    return student_import.summary()
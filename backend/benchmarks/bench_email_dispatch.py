@@ -0,0 +1,167 @@
+"""
+End-to-end load test of notice email dispatch against the in-process SMTP sink.
+
+Seeds a synthetic cohort per audience size, publishes a notice to it through
+POST /api/notices and waits for the background email job to finish, then
+reports publish latency and dispatch throughput. Nothing leaves the process:
+EMAIL_BACKEND is forced to "sink".
+
+Usage (from the backend directory, against a scratch database):
+    python benchmarks/bench_email_dispatch.py --sizes 1000,10000,50000 \\
+        --latency-ms 40 --failure-rate 0.01 --workers 4
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_COURSE = "BENCH"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,50000',
+                        help="comma-separated audience sizes")
+    parser.add_argument('--latency-ms', type=float, default=40.0, help="sink delay per message")
+    parser.add_argument('--per-recipient-ms', type=float, default=0.0, help="sink delay per recipient")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="share of messages answered with 451")
+    parser.add_argument('--workers', type=int, default=None, help="EMAIL_WORKERS override")
+    parser.add_argument('--chunk-size', type=int, default=None, help="EMAIL_CHUNK_SIZE override")
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI'))
+    parser.add_argument('--db', default='smart-notice-bench', help="scratch database to seed")
+    parser.add_argument('--timeout', type=float, default=1800, help="seconds to wait per job")
+    parser.add_argument('--keep', action='store_true', help="leave the seeded data in place")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    # Read by email_send_function at import time, so set before importing the app
+    os.environ['EMAIL_BACKEND'] = 'sink'
+    os.environ['EMAIL_SINK_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['EMAIL_SINK_PER_RECIPIENT_MS'] = str(args.per_recipient_ms)
+    os.environ['EMAIL_SINK_FAILURE_RATE'] = str(args.failure_rate)
+    os.environ.setdefault('EMAIL_RETRY_BACKOFF', '0.2')
+    if args.workers is not None:
+        os.environ['EMAIL_WORKERS'] = str(args.workers)
+    if args.chunk_size is not None:
+        os.environ['EMAIL_CHUNK_SIZE'] = str(args.chunk_size)
+
+
+def seed_audience(Student, size):
+    """Insert `size` students into their own cohort; returns the department name"""
+    department = f"AUD{size}"
+    students = Student._get_collection()
+    students.delete_many({'course': BENCH_COURSE, 'branch': department})
+    for start in range(0, size, 5000):
+        students.insert_many([
+            {
+                'univ_roll_no': f"BENCH-{size}-{index}",
+                'course': BENCH_COURSE,
+                'branch': department,
+                'name': f"Bench Student {index}",
+                'official_email': f"bench{size}.{index}@example.invalid"
+            }
+            for index in range(start, min(size, start + 5000))
+        ], ordered=False)
+    return department
+
+
+def wait_for_job(dispatcher, job_id, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = dispatcher.get_job(job_id)
+        if job and job['finishedAt']:
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Email job {job_id} did not finish within {timeout:.0f}s")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+
+    import jwt
+    from flask import Flask
+    from mongoengine import connect
+    from config import Config
+    from app.controllers.notices_controller import notice_bp
+    from app.models.email_delivery_model import EmailDelivery
+    from app.models.notice_model import Notice
+    from app.models.student_model import Student
+    from app.models.user_model import User
+    from app.utils import email_send_function
+    from app.utils.smtp_sink import sink_stats
+
+    if args.db == 'smart-notice':
+        print("Refusing to seed synthetic students into the application database; pass a scratch --db.")
+        return 2
+    connect(db=args.db, host=args.mongo_uri)
+
+    app = Flask(__name__)
+    app.register_blueprint(notice_bp)
+    client = app.test_client()
+
+    author = User.objects(email='bench-author@example.invalid').first() or User(
+        name='Benchmark Author', email='bench-author@example.invalid', password='-', role='academic'
+    ).save()
+    token = jwt.encode({
+        'user_id': str(author.id),
+        'role': author.role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=2)
+    }, Config.SECRET_KEY)
+    headers = {'Authorization': f"Bearer {token}"}
+
+    dispatcher = email_send_function.email_dispatcher
+    print(f"sink latency {args.latency_ms}ms/message + {args.per_recipient_ms}ms/recipient, "
+          f"failure rate {args.failure_rate:.1%}, {dispatcher.workers} workers, "
+          f"{email_send_function.EMAIL_CHUNK_SIZE} recipients/chunk")
+    print(f"{'audience':>9} {'publish ms':>11} {'dispatch s':>11} {'recipients/s':>13} "
+          f"{'msgs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'retries':>8} {'reuse':>6} {'status':>8}")
+
+    notice_ids = []
+    try:
+        for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+            department = seed_audience(Student, size)
+            dispatcher.metrics = email_send_function.DispatchMetrics(window=args.timeout)
+            dispatcher.pool.opened = dispatcher.pool.reused = 0
+            sink_stats.reset()
+
+            started = time.perf_counter()
+            response = client.post('/api/notices', headers=headers, data={
+                'title': f"Benchmark notice for {size} students",
+                'content': '<p>Load test</p>',
+                'course': BENCH_COURSE,
+                'department': department,
+                'status': 'published',
+                'send_options': '{"email": true, "web": true}'
+            })
+            publish_ms = (time.perf_counter() - started) * 1000
+            if response.status_code != 201:
+                print(f"{size:>9} publish failed: {response.status_code} {response.get_data(as_text=True)}")
+                continue
+            body = response.get_json()
+            notice_ids.append(body['noticeId'])
+
+            job = wait_for_job(dispatcher, body['emailJobId'], args.timeout)
+            elapsed = job['finishedAt'] - job['createdAt']
+            delivered = sink_stats.snapshot()
+            metrics = dispatcher.get_metrics()
+            print(f"{size:>9} {publish_ms:>11.1f} {elapsed:>11.2f} {delivered['recipients'] / elapsed:>13.1f} "
+                  f"{delivered['messages'] / elapsed:>8.1f} {metrics['chunkLatencyMs']['p50'] or 0:>8.1f} "
+                  f"{metrics['chunkLatencyMs']['p95'] or 0:>8.1f} {metrics['retries']:>8} "
+                  f"{metrics['connections']['reuseRate']:>6.0%} {job['status']:>8}")
+    finally:
+        if not args.keep:
+            Student._get_collection().delete_many({'course': BENCH_COURSE})
+            EmailDelivery.objects(notice_id__in=notice_ids).delete()
+            Notice.objects(id__in=notice_ids).delete()
+            author.delete()
+        dispatcher.pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Per-request cost of access-token verification, with and without the verified-token cache.
+
+Issues access tokens the way auth_controllers.login does (HS256, 15-minute
+exp) and replays them the way a polling frontend does: every user presents the
+same token on every request until it expires. Compares the previous
+jwt.decode + manual expiry check with token_cache.verify_token.
+
+Usage (from the backend directory):
+    python benchmarks/bench_token_cache.py --users 200 --requests-per-token 500
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from bson import ObjectId
+from config import Config
+from app.middleware import token_cache
+
+
+def issue_token(role='academic'):
+    return jwt.encode({
+        'user_id': str(ObjectId()),
+        'role': role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=15)
+    }, Config.SECRET_KEY)
+
+
+def verify_uncached(token):
+    data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+    if 'exp' not in data or datetime.datetime.utcnow() > datetime.datetime.utcfromtimestamp(data['exp']):
+        return None
+    return data
+
+
+def run(verify, requests):
+    started = time.perf_counter()
+    for token in requests:
+        if verify(token) is None:
+            raise RuntimeError("token unexpectedly rejected")
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help="distinct live tokens")
+    parser.add_argument('--requests-per-token', type=int, default=500,
+                        help="requests each token serves before it expires")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    tokens = [issue_token() for _ in range(args.users)]
+    requests = tokens * args.requests_per_token
+    random.Random(args.seed).shuffle(requests)
+
+    token_cache.clear_tokens()
+    uncached = run(verify_uncached, requests)
+    cached = run(token_cache.verify_token, requests)
+    stats = token_cache.token_cache_stats()
+
+    per_uncached = uncached / len(requests) * 1e6
+    per_cached = cached / len(requests) * 1e6
+    print(f"{len(requests)} requests over {args.users} tokens "
+          f"({args.requests_per_token} requests per 15-minute token)")
+    print(f"jwt.decode + expiry check: {per_uncached:8.2f} us/request")
+    print(f"verify_token (cached):     {per_cached:8.2f} us/request "
+          f"(hit ratio {stats['hitRatio']:.2%}, {stats['size']} entries)")
+    print(f"saving:                    {per_uncached - per_cached:8.2f} us/request "
+          f"({per_uncached / per_cached:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Import-time budget check for backend startup.
+
+Builds the application with create_app() in a fresh interpreter under
+`python -X importtime` and fails if startup pulls in a library that must only
+load on first use, or if the total import time exceeds the budget.
+
+Usage (from the backend directory):
+    python benchmarks/check_import_time.py [--budget-ms 600] [--runs 5] [--top 15]
+
+Exit status is 1 when the budget is exceeded, so it can gate CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by specific endpoints; importing them at startup is a regression
+LAZY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+# backend/app.py is shadowed by the app/ package, so load it by path
+BOOT = (
+    "import importlib.util, os\n"
+    "spec = importlib.util.spec_from_file_location('backend_app', os.path.join(os.getcwd(), 'app.py'))\n"
+    "module = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(module)\n"
+    "module.create_app()\n"
+)
+
+
+def profile_startup():
+    """Run one cold start; returns (wall seconds, {module: cumulative us}, top-level module names)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app() failed:\n{result.stderr[-2000:]}")
+
+    modules, top_level = {}, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        # Nested imports are indented beyond the single separating space
+        if not name.startswith('  '):
+            top_level.append(name.strip())
+    return wall, modules, top_level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 600)),
+                        help="maximum median time spent importing modules")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    walls, totals = [], []
+    for _ in range(args.runs):
+        wall, modules, top_level = profile_startup()
+        walls.append(wall)
+        # Top-level imports add up to the whole import cost
+        totals.append(sum(modules[name] for name in top_level) / 1000)
+
+    import_ms = statistics.median(totals)
+    print(f"cold start (create_app, {args.runs} runs): median wall {statistics.median(walls) * 1000:.0f} ms, "
+          f"median import time {import_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print("slowest top-level imports (last run):")
+    for us, name in sorted(((modules[name], name) for name in top_level), reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted({name.split('.')[0] for name in modules} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"imported at startup but should load on first use: {', '.join(eager)}")
+    if import_ms > args.budget_ms:
+        failures.append(f"import time {import_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
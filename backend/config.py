@@ -5,4 +5,48 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9eyJzdWIiOiIxMjM0NTY3ODkwIiwibmFtZSI6k')
-    MONGO_URI = os.environ.get('MONGO_URI')
\ No newline at end of file
+    MONGO_URI = os.environ.get('MONGO_URI')
+
+    # In-process cache of notice creators (seconds / max entries)
+    CREATOR_CACHE_TTL = int(os.environ.get('CREATOR_CACHE_TTL', 300))
+    CREATOR_CACHE_SIZE = int(os.environ.get('CREATOR_CACHE_SIZE', 1024))
+
+    # In-process cache of authenticated principals used by token_required (seconds / max entries)
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+    PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 4096))
+
+    # Verified access tokens remembered until their exp (max entries)
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+
+    # Process pool for password hashing/verification (0 workers hashes on the request thread).
+    # Every server worker process has its own pool, so this is per worker: the default
+    # splits the cores across WEB_CONCURRENCY workers (gunicorn's worker count variable)
+    WEB_CONCURRENCY = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+    PASSWORD_POOL_WORKERS = int(os.environ.get(
+        'PASSWORD_POOL_WORKERS', max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+    ))
+    PASSWORD_POOL_MAX_PENDING = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', 64))
+    PASSWORD_POOL_WAIT_SECONDS = float(os.environ.get('PASSWORD_POOL_WAIT_SECONDS', 10))
+
+    # Students written per bulk insert by the roster importer
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+    # Background roster imports (POST /api/students/upload-details with async=true)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+    IMPORT_JOB_MAX_ERRORS = int(os.environ.get('IMPORT_JOB_MAX_ERRORS', 1000))
+    IMPORT_SPOOL_DIR = os.environ.get(
+        'IMPORT_SPOOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool', 'imports')
+    )
+
+    # Write-behind buffering of notice read receipts
+    READ_BUFFER_ENABLED = os.environ.get('READ_BUFFER_ENABLED', 'true').lower() == 'true'
+    READ_BUFFER_MAX_PENDING = int(os.environ.get('READ_BUFFER_MAX_PENDING', 500))
+    READ_BUFFER_FLUSH_SECONDS = float(os.environ.get('READ_BUFFER_FLUSH_SECONDS', 2))
+    READ_BUFFER_FSYNC = os.environ.get('READ_BUFFER_FSYNC', 'false').lower() == 'true'
+    READ_BUFFER_SPILL_DIR = os.environ.get(
+        'READ_BUFFER_SPILL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool', 'reads')
+    )
+
+    # Materialized per-student inbox as the read path for GET /api/notices/my
+    INBOX_ENABLED = os.environ.get('INBOX_ENABLED', 'false').lower() == 'true'
+    INBOX_FANOUT_CHUNK = int(os.environ.get('INBOX_FANOUT_CHUNK', 1000))
@@ -0,0 +1,224 @@
+"""
+Maintenance commands for the Smart Notice backend.
+
+Usage (from the backend directory):
+    python manage.py migrate-reads [--prune]
+    python manage.py backfill-audience [--drop-student-lists]
+    python manage.py rebuild-inbox
+    python manage.py ensure-indexes [--drop-extra]
+    python manage.py audit-queries [--db smart-notice-audit] [--no-seed] [--keep]
+"""
+import argparse
+import sys
+from types import SimpleNamespace
+from bson import ObjectId
+from mongoengine import connect
+from config import Config
+
+
+def migrate_reads(args):
+    """Copy embedded Notice.reads entries into the notice_reads collection"""
+    from pymongo import UpdateOne
+    from app.models.notice_model import Notice
+    from app.models.notice_read_model import NoticeRead
+
+    notices = Notice._get_collection()
+    reads = NoticeRead._get_collection()
+    NoticeRead.ensure_indexes()
+
+    migrated_notices = migrated_reads = 0
+    for doc in notices.find({'reads.0': {'$exists': True}}, {'reads': 1}):
+        per_user = {}
+        for read in doc['reads']:
+            user_id = read.get('user_id')
+            if not user_id:
+                continue
+            timestamp = read.get('timestamp')
+            entry = per_user.setdefault(user_id, {'first': timestamp, 'last': timestamp, 'count': 0})
+            entry['count'] += 1
+            if timestamp:
+                entry['first'] = min(filter(None, [entry['first'], timestamp]))
+                entry['last'] = max(filter(None, [entry['last'], timestamp]))
+
+        operations = []
+        for user_id, entry in per_user.items():
+            update = {'$setOnInsert': {'read_count': entry['count']}}
+            if entry['first']:
+                update['$min'] = {'first_read_at': entry['first']}
+                update['$max'] = {'last_read_at': entry['last']}
+            operations.append(UpdateOne({'notice_id': doc['_id'], 'user_id': user_id}, update, upsert=True))
+
+        if operations:
+            reads.bulk_write(operations, ordered=False)
+
+        # Unique readers are now whatever notice_reads holds for this notice
+        fields = {'$set': {'read_count': reads.count_documents({'notice_id': doc['_id']})}}
+        if args.prune:
+            fields['$unset'] = {'reads': ''}
+        notices.update_one({'_id': doc['_id']}, fields)
+
+        migrated_notices += 1
+        migrated_reads += len(operations)
+
+    print(f"Migrated {migrated_reads} readers across {migrated_notices} notices.")
+    if migrated_notices and not args.prune:
+        print("Embedded reads were left in place; re-run with --prune to remove them.")
+    return 0
+
+
+def backfill_audience(args):
+    """Derive notice audiences, carrying over students reached via Student.notices"""
+    from pymongo import UpdateOne
+    from app.models.notice_model import Notice
+    from app.models.student_model import Student
+    from app.utils.audience import notice_audience_keys, reader_audience_keys
+
+    notices = Notice._get_collection()
+    students = Student._get_collection()
+    Notice.ensure_indexes()
+
+    targeting = {}
+    for doc in notices.find({}, {'departments': 1, 'program_course': 1, 'year': 1, 'section': 1,
+                                 'audience_students': 1}):
+        cohorts = set(notice_audience_keys(doc.get('departments') or [], doc.get('program_course'),
+                                           doc.get('year'), doc.get('section')))
+        targeting[doc['_id']] = (doc, cohorts, set(doc.get('audience_students') or []))
+
+    # Students who received a notice outside its cohort were explicitly selected
+    for student in students.find({'notices.0': {'$exists': True}},
+                                 {'notices': 1, 'course': 1, 'branch': 1, 'year': 1, 'section': 1}):
+        reader = SimpleNamespace(id=student['_id'], **{
+            field: student.get(field) for field in ('course', 'branch', 'year', 'section')
+        })
+        reader_keys = set(reader_audience_keys(reader))
+        for notice_id in student['notices']:
+            entry = targeting.get(notice_id)
+            if entry and not reader_keys & entry[1]:
+                entry[2].add(student['_id'])
+
+    operations = []
+    for notice_id, (doc, _, selected) in targeting.items():
+        selected = sorted(selected)
+        keys = notice_audience_keys(doc.get('departments') or [], doc.get('program_course'),
+                                    doc.get('year'), doc.get('section'), selected)
+        operations.append(UpdateOne({'_id': notice_id},
+                                    {'$set': {'audience_students': selected, 'audience_keys': keys}}))
+    for start in range(0, len(operations), 1000):
+        notices.bulk_write(operations[start:start + 1000], ordered=False)
+    print(f"Backfilled audiences for {len(operations)} notices.")
+
+    if args.drop_student_lists:
+        result = students.update_many({'notices': {'$exists': True}}, {'$unset': {'notices': ''}})
+        print(f"Removed legacy notice lists from {result.modified_count} students.")
+    return 0
+
+
+def rebuild_inbox(args):
+    """Materialize the per-student inbox for every existing notice"""
+    from app.models.inbox_model import InboxEntry
+    from app.models.notice_model import Notice
+    from app.models.notice_read_model import NoticeRead
+    from app.utils.inbox import sync_notice
+
+    InboxEntry.ensure_indexes()
+    rows = 0
+    notice_ids = [doc['_id'] for doc in Notice._get_collection().find({}, {'_id': 1})]
+    for notice_id in notice_ids:
+        rows += sync_notice(notice_id)
+
+    # Carry read state over from notice_reads
+    inbox = InboxEntry._get_collection()
+    for read in NoticeRead._get_collection().find({}, {'notice_id': 1, 'user_id': 1, 'first_read_at': 1}):
+        if ObjectId.is_valid(read['user_id']):
+            inbox.update_one(
+                {'student_id': ObjectId(read['user_id']), 'notice_id': read['notice_id']},
+                {'$set': {'read': True, 'read_at': read.get('first_read_at')}}
+            )
+
+    print(f"Synced {rows} inbox rows for {len(notice_ids)} notices.")
+    return 0
+
+
+def ensure_indexes(args):
+    """Create declared indexes and report (or drop) the ones no model declares"""
+    from app.utils.query_audit import reconcile_indexes
+
+    for collection, extra in reconcile_indexes(drop_extra=args.drop_extra):
+        for key in extra:
+            fields = ', '.join(f"{name} {direction}" for name, direction in key)
+            print(f"{collection}: {'dropped' if args.drop_extra else 'undeclared'} index ({fields})")
+    if not args.drop_extra:
+        print("Declared indexes are in place; re-run with --drop-extra to remove undeclared ones.")
+    return 0
+
+
+def audit_queries(args):
+    """Explain the hot query shapes and fail if any scans a whole collection"""
+    from mongoengine.connection import get_db
+    from app.utils.query_audit import reconcile_indexes, audit_queries as explain_queries, seed
+
+    db = get_db()
+    if db.name != args.db:
+        print(f"MONGO_URI names database {db.name}; audit a scratch database by leaving it out of the URI.")
+        return 1
+    if not args.no_seed:
+        if any(db[name].estimated_document_count() for name in ('notices', 'students')):
+            print(f"Refusing to seed {db.name}: it already holds data (use --no-seed to audit it as is).")
+            return 1
+        seed()
+    reconcile_indexes()
+
+    try:
+        results = explain_queries()
+    finally:
+        if not args.no_seed and not args.keep:
+            db.client.drop_database(db.name)
+
+    width = max(len(name) for name, _ in results)
+    collscans = 0
+    for name, stages in results:
+        flag = 'COLLSCAN' if 'COLLSCAN' in stages else 'ok'
+        collscans += flag != 'ok'
+        print(f"{name:<{width}}  {flag:<8}  {', '.join(sorted(stages))}")
+    print(f"{len(results)} queries explained, {collscans} collection scans.")
+    return 1 if collscans else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart Notice maintenance commands")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reads_parser = commands.add_parser('migrate-reads', help=migrate_reads.__doc__)
+    reads_parser.add_argument('--prune', action='store_true',
+                              help="unset Notice.reads once its entries are copied")
+    reads_parser.set_defaults(handler=migrate_reads)
+
+    audience_parser = commands.add_parser('backfill-audience', help=backfill_audience.__doc__)
+    audience_parser.add_argument('--drop-student-lists', action='store_true',
+                                 help="unset Student.notices once audiences are backfilled")
+    audience_parser.set_defaults(handler=backfill_audience)
+
+    inbox_parser = commands.add_parser('rebuild-inbox', help=rebuild_inbox.__doc__)
+    inbox_parser.set_defaults(handler=rebuild_inbox)
+
+    indexes_parser = commands.add_parser('ensure-indexes', help=ensure_indexes.__doc__)
+    indexes_parser.add_argument('--drop-extra', action='store_true',
+                                help="drop indexes that no model declares")
+    indexes_parser.set_defaults(handler=ensure_indexes)
+
+    audit_parser = commands.add_parser('audit-queries', help=audit_queries.__doc__)
+    audit_parser.add_argument('--db', default='smart-notice-audit',
+                              help="scratch database to seed and audit")
+    audit_parser.add_argument('--no-seed', action='store_true',
+                              help="audit the database as it is instead of seeding it")
+    audit_parser.add_argument('--keep', action='store_true',
+                              help="keep the seeded database afterwards")
+    audit_parser.set_defaults(handler=audit_queries)
+
+    args = parser.parse_args(argv)
+    connect(db=getattr(args, 'db', None) or "smart-notice", host=Config.MONGO_URI)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -177,7 +177,7 @@ const AllNoticesAnalytics = () => {
       const [noticesRes, usersRes, analyticsRes] = await Promise.all([
         fetchWithAuth(`${import.meta.env.VITE_NOTICES_GET}`),
         fetchWithAuth(`${import.meta.env.VITE_GET_USERS_COUNT}`).catch(() => ({ json: () => ({ count: 0 }) })),
-        fetchWithAuth(`${import.meta.env.VITE_NOTICES_ANALYTICS}`).catch(() => ({ json: () => ({ totalNotices: 0, totalReads: 0 }) }))
+        fetchWithAuth(`${import.meta.env.VITE_NOTICES_ANALYTICS}`).catch(() => ({ json: () => ({}) }))
       ]);
 
       const noticesData = await noticesRes.json();
@@ -194,11 +194,13 @@ const AllNoticesAnalytics = () => {
         })
       );
 
-      const totalReads = noticesWithReads.reduce((sum, notice) => sum + notice.readCount, 0);
+      // The notice feed is only the newest page, so totals come from the analytics
+      // endpoint; the page's own counts are a fallback if that request fails
+      const pageReads = noticesWithReads.reduce((sum, notice) => sum + notice.readCount, 0);
 
       setAnalytics({
-        totalNotices: noticesData.length,
-        totalReads,
+        totalNotices: analyticsData.totalNotices ?? noticesData.length,
+        totalReads: analyticsData.totalReads ?? pageReads,
         totalUsers: usersData.count || 0,
         notices: noticesWithReads
       });
@@ -19,22 +19,30 @@ const NoticeListPage = () => {
       setIsLoading(true);
       const token = localStorage.getItem('token');
 
-      const response = await fetch(`${import.meta.env.VITE_NOTICES_GET}`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
+      // The feed is paginated; follow X-Next-Cursor until every page is loaded
+      const data = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: '200' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${import.meta.env.VITE_NOTICES_GET}?${params}`, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+        });
 
-      if (!response.ok) {
-        if (response.status === 401) {
-          localStorage.removeItem('token');
-          window.location.href = '/login';
-          return;
+        if (!response.ok) {
+          if (response.status === 401) {
+            localStorage.removeItem('token');
+            window.location.href = '/login';
+            return;
+          }
+          throw new Error('Failed to fetch notices');
         }
-        throw new Error('Failed to fetch notices');
-      }
 
-      const data = await response.json();
+        data.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
       
       const transformedNotices = data.map(notice => ({
         ...notice,
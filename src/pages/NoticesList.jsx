@@ -17,25 +17,33 @@ export default function NoticeList() {
         // Debugging
         console.log("Fetching notices with token:", token);
 
-        const response = await fetch(`${import.meta.env.VITE_NOTICES_GET}`, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        });
+        // The feed is paginated; follow X-Next-Cursor until every page is loaded
+        const data = [];
+        let cursor = null;
+        do {
+          const params = new URLSearchParams({ limit: "200" });
+          if (cursor) params.set("cursor", cursor);
+          const response = await fetch(`${import.meta.env.VITE_NOTICES_GET}?${params}`, {
+            headers: {
+              Authorization: `Bearer ${token}`,
+            },
+          });
 
-        console.log("Response status:", response);
-        
-        if (!response.ok) {
-          // Handle token expiration
-          if (response.status === 401) {
-            localStorage.removeItem("token");
-            window.location.href = "/login";
-            return;
+          console.log("Response status:", response);
+
+          if (!response.ok) {
+            // Handle token expiration
+            if (response.status === 401) {
+              localStorage.removeItem("token");
+              window.location.href = "/login";
+              return;
+            }
+            throw new Error("Failed to fetch notices");
           }
-          throw new Error("Failed to fetch notices");
-        }
 
-        const data = await response.json();
+          data.push(...await response.json());
+          cursor = response.headers.get("X-Next-Cursor");
+        } while (cursor);
         console.log("Received notices:", data);
         
         // Transform data to match frontend expectations